@@ -0,0 +1,246 @@
+"""
+Batch execution of many scenarios in one process.
+
+This module reads a manifest of scenarios (JSONL or CSV), streams them through
+a persistent worker pool and writes one summary row per scenario as soon as it
+finishes. Scenarios whose id is already in the output are skipped, so an
+interrupted batch can be resumed by running it again.
+"""
+
+import csv
+import json
+import os
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from time import monotonic
+from mining_simulation.scenario import Scenario
+from mining_simulation.simulator import Simulator
+from mining_simulation.results import SimulationResults
+
+SCENARIO_COLUMNS = ['id', 'trucks', 'stations', 'hours', 'warmup_hours', 'seed', 'priority_trucks', 'reservations']
+KPI_COLUMNS = list(SimulationResults([], []).totals())
+COLUMNS = SCENARIO_COLUMNS + ['minutes'] + KPI_COLUMNS
+
+# most rows buffered per parquet part file
+PARQUET_PART_ROWS = 10000
+
+# most seconds rows stay buffered before a parquet part file is written
+PARQUET_FLUSH_S = 30
+
+
+def read_manifest(path):
+    """
+    Lazily read the scenarios of a JSONL or CSV manifest.
+
+    Raises ValueError naming the row of the first invalid scenario.
+    """
+    with open(path, newline='') as manifest:
+        if path.endswith('.csv'):
+            rows = csv.DictReader(manifest)
+        else:
+            rows = (line for line in manifest if line.strip())
+
+        for number, row in enumerate(rows, start=1):
+            try:
+                scenario = Scenario.from_dict(row if isinstance(row, dict) else json.loads(row))
+            except KeyError as error:
+                raise ValueError(f"{path} row {number}: missing {error}") from error
+            except (TypeError, ValueError) as error:
+                raise ValueError(f"{path} row {number}: {error}") from error
+
+            yield scenario
+
+
+def validate_manifest(path, kernel=False):
+    """
+    Check every scenario of a manifest before any is run, naming the first invalid row.
+
+    The manifest is streamed, so memory stays flat however long it is.
+    """
+    for scenario in read_manifest(path):
+        if kernel and (scenario.priority_trucks or scenario.reservations):
+            raise ValueError(f"{path} scenario {scenario.id}: the kernel does not support priority trucks or reservations")
+
+
+def run_scenario(scenario, kernel=False):
+    """
+    Run a single scenario and summarize it as an output row.
+    """
+    with Simulator.from_scenario(scenario) as sim:
+        sim.start(kernel=kernel)
+
+    row = scenario.to_dict()
+    row['minutes'] = sim.minute - sim.warmup_minutes
+    row.update(sim.results.totals())
+
+    return row
+
+
+class CsvResultWriter:
+    """
+    Appends result rows to a CSV file, flushing after every write.
+    """
+
+    def __init__(self, path):
+        """
+        Open the output file, writing the header when it is new.
+        """
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=COLUMNS)
+        if new:
+            self.writer.writeheader()
+
+    @staticmethod
+    def completed_ids(path):
+        """
+        Ids of the scenarios already in the output file.
+        """
+        if not os.path.exists(path):
+            return set()
+
+        with open(path, newline='') as output:
+            return {row['id'] for row in csv.DictReader(output)}
+
+    def write(self, rows):
+        """
+        Append rows to the file.
+        """
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def flush(self):
+        """
+        Rows are flushed as they are written.
+        """
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """
+    Writes result rows as parquet part files inside an output directory.
+
+    Rows are buffered and written as a part once PARQUET_PART_ROWS are in,
+    PARQUET_FLUSH_S have passed or the caller flushes. Each part is a
+    complete file with the same schema, so an interrupted batch keeps every
+    finished part and the parts read back as one dataset. Requires pyarrow.
+    """
+
+    def __init__(self, path):
+        """
+        Create the output directory.
+        """
+        # imported here so pyarrow is only needed for parquet output
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.path = path
+        # pinned so a part where every seed is None still merges with the others
+        types = {'id': pyarrow.string(), 'reservations': pyarrow.bool_()}
+        self.schema = pyarrow.schema([(column, types.get(column, pyarrow.int64())) for column in COLUMNS])
+        self.buffer = []
+        self.buffered_at = None
+        os.makedirs(path, exist_ok=True)
+        self.parts = len(self._part_files(path))
+
+    @staticmethod
+    def _part_files(path):
+        """
+        Part files already in the output directory.
+        """
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.parquet'))
+
+    @staticmethod
+    def completed_ids(path):
+        """
+        Ids of the scenarios already in the output directory.
+        """
+        if not os.path.isdir(path):
+            return set()
+
+        import pyarrow.parquet
+
+        ids = set()
+        for part in ParquetResultWriter._part_files(path):
+            ids.update(pyarrow.parquet.read_table(part, columns=['id']).column('id').to_pylist())
+
+        return ids
+
+    def write(self, rows):
+        """
+        Buffer rows, writing a part file once enough are in or they have waited long enough.
+        """
+        if self.buffered_at is None:
+            self.buffered_at = monotonic()
+        self.buffer.extend(rows)
+        if len(self.buffer) >= PARQUET_PART_ROWS or monotonic() - self.buffered_at >= PARQUET_FLUSH_S:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows as a new part file.
+        """
+        if not self.buffer:
+            return
+
+        columns = {column: [row[column] for row in self.buffer] for column in COLUMNS}
+        part = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        self.parquet.write_table(self.pyarrow.table(columns, schema=self.schema), part)
+        self.parts += 1
+        self.buffer = []
+        self.buffered_at = None
+
+    def close(self):
+        self.flush()
+
+
+def result_writer(path):
+    """
+    Pick the result writer class for an output path.
+    """
+    if path.endswith('.parquet'):
+        return ParquetResultWriter
+
+    return CsvResultWriter
+
+
+def run_batch(manifest, output, workers=None, chunksize=16, kernel=False):
+    """
+    Run every scenario of a manifest that is not already in the output.
+
+    Scenarios are dispatched to a persistent pool in chunks and read from the
+    manifest a window at a time, so memory stays flat however long the
+    manifest is. The writer is flushed after every window. The whole
+    manifest is validated first, so an invalid row fails the batch before
+    anything runs instead of halfway through. Returns the number of
+    scenarios run and skipped.
+    """
+    validate_manifest(manifest, kernel)
+    writer_cls = result_writer(output)
+    completed = writer_cls.completed_ids(output)
+    scenarios = (scenario for scenario in read_manifest(manifest) if scenario.id not in completed)
+    run = partial(run_scenario, kernel=kernel)
+
+    ran = 0
+    writer = writer_cls(output)
+    try:
+        with Pool(workers) as pool:
+            window = chunksize * (workers or os.cpu_count() or 1) * 4
+            while True:
+                pending = list(islice(scenarios, window))
+                if not pending:
+                    break
+
+                for row in pool.imap_unordered(run, pending, chunksize):
+                    writer.write([row])
+                    ran += 1
+                writer.flush()
+    finally:
+        writer.close()
+
+    return ran, len(completed)
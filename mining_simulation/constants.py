@@ -18,4 +18,7 @@ HELIUM_UNLOAD_TIME_MIN = 5
 SIMULATION_TIME_HRS = 72
 
 # Standard time interval for the simulation's time advancement (in minutes)
-PASS_TIME_MIN = 1
\ No newline at end of file
+PASS_TIME_MIN = 1
+
+# Number of truck priority classes at unloading stations, higher classes unload first
+PRIORITY_CLASSES = 2
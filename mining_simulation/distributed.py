@@ -0,0 +1,538 @@
+"""
+Distributed replication runner for the mining simulation.
+
+This module spreads chunks of Scenario objects over worker processes on any
+number of machines. A Coordinator serves the chunks over TCP and merges the
+result rows as they stream back; workers started with run_worker connect to
+it, pull a chunk, run it and pull the next one.
+
+The protocol is a sequence of length-prefixed JSON arrays, scenarios travel
+as their manifest rows:
+
+    worker -> coordinator: ['request'] | ['heartbeat'] | ['row', chunk_id, row]
+                           | ['error', chunk_id, scenario_id, message] | ['done', chunk_id]
+    coordinator -> worker: ['chunk', chunk_id, scenarios, heartbeat_s] | ['wait'] | ['stop']
+
+Workers stream a row or an error per scenario and heartbeat every
+heartbeat_s while running a chunk. Chunks are read from the scenarios
+lazily, so only pending and in-flight chunks are held in memory. Every
+chunk handed out comes with a lease, renewed by any message from the
+worker, and the scenarios it has not returned are put back in the queue
+when the worker disconnects, goes silent for a lease or finishes the chunk
+with errors. A chunk is tried MAX_ATTEMPTS times before its remaining
+scenarios are reported as failed. Idle workers steal in-flight chunks once
+nothing is pending, so a slow worker does not hold up the run; the first
+row of a scenario wins. Nothing on the wire is executed, but workers are
+not authenticated, so serve on a private network only.
+
+LocalCluster runs the same coordinator with worker processes on the loopback
+interface, as a single machine stand-in for a cluster.
+"""
+
+import json
+import selectors
+import socket
+import struct
+import threading
+from collections import deque
+from itertools import count, islice
+from multiprocessing import get_context
+from time import monotonic, sleep
+from mining_simulation.batch import COLUMNS, read_manifest, result_writer, run_scenario, validate_manifest
+from mining_simulation.scenario import Scenario
+
+FRAME = struct.Struct('!I')
+
+# largest message accepted from a peer
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# bytes read from a ready connection at a time
+RECV_BYTES = 64 * 1024
+
+# seconds an idle worker waits before asking for work again
+WAIT_S = 0.05
+
+# seconds a send to a worker may block before the worker is dropped
+SEND_TIMEOUT_S = 10
+
+# seconds a worker may stay silent before its chunk is handed out again
+LEASE_S = 60
+
+# heartbeats a worker sends per lease while running a chunk
+HEARTBEATS_PER_LEASE = 4
+
+# times a chunk is handed out before its remaining scenarios fail
+MAX_ATTEMPTS = 3
+
+# copies of a chunk that may run at once, the original plus stolen ones
+MAX_COPIES = 2
+
+
+def send_message(sock, message):
+    """
+    Send a length-prefixed JSON message.
+    """
+    payload = json.dumps(message).encode()
+    sock.sendall(FRAME.pack(len(payload)) + payload)
+
+
+def _frame_size(header):
+    """
+    Payload size announced by a frame header.
+    """
+    size = FRAME.unpack(header)[0]
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+
+    return size
+
+
+def _recv_exactly(sock, size):
+    """
+    Read exactly size bytes, None when the connection closes first.
+    """
+    data = bytearray()
+    while len(data) < size:
+        block = sock.recv(size - len(data))
+        if not block:
+            return None
+        data.extend(block)
+
+    return bytes(data)
+
+
+def recv_message(sock):
+    """
+    Receive a length-prefixed JSON message, None when the connection is closed.
+    """
+    header = _recv_exactly(sock, FRAME.size)
+    if header is None:
+        return None
+
+    payload = _recv_exactly(sock, _frame_size(header))
+
+    return None if payload is None else json.loads(payload)
+
+
+def read_frames(buffer):
+    """
+    Pop the complete messages off the front of a receive buffer.
+    """
+    messages = []
+    while len(buffer) >= FRAME.size:
+        end = FRAME.size + _frame_size(buffer[:FRAME.size])
+        if len(buffer) < end:
+            break
+
+        messages.append(json.loads(buffer[FRAME.size:end]))
+        del buffer[:end]
+
+    return messages
+
+
+def replicate(scenarios, replications):
+    """
+    Expand every scenario into replications with consecutive seeds.
+
+    Replication i of a scenario has id '<id>/<i>' and seed seed + i, an
+    unseeded scenario starts at seed 0.
+    """
+    for scenario in scenarios:
+        for replication in range(replications):
+            yield Scenario(id=f"{scenario.id}/{replication}",
+                           trucks=scenario.trucks,
+                           stations=scenario.stations,
+                           hours=scenario.hours,
+                           warmup_hours=scenario.warmup_hours,
+                           seed=(scenario.seed or 0) + replication,
+                           priority_trucks=scenario.priority_trucks,
+                           reservations=scenario.reservations)
+
+
+def _heartbeat(sock, lock, interval, done):
+    """
+    Send a heartbeat every interval seconds until done is set or the connection fails.
+    """
+    while not done.wait(interval):
+        try:
+            with lock:
+                send_message(sock, ['heartbeat'])
+        except OSError:
+            return
+
+
+def _run_chunk(sock, lock, chunk_id, scenarios, kernel=False):
+    """
+    Run the scenarios of a chunk, sending a row or an error for each as it finishes.
+    """
+    for scenario in scenarios:
+        try:
+            message = ['row', chunk_id, run_scenario(Scenario.from_dict(scenario), kernel=kernel)]
+        except Exception as error:
+            # a failing scenario is reported, the coordinator decides whether to retry it
+            message = ['error', chunk_id, scenario.get('id'), f"{type(error).__name__}: {error}"]
+
+        with lock:
+            send_message(sock, message)
+
+    with lock:
+        send_message(sock, ['done', chunk_id])
+
+
+def run_worker(host, port, kernel=False):
+    """
+    Pull and run chunks from a coordinator until it stops or goes away.
+    """
+    lock = threading.Lock()
+    try:
+        with socket.create_connection((host, port)) as sock:
+            while True:
+                send_message(sock, ['request'])
+                message = recv_message(sock)
+                if message is None or message[0] == 'stop':
+                    return
+
+                if message[0] == 'wait':
+                    sleep(WAIT_S)
+                    continue
+
+                _, chunk_id, scenarios, heartbeat_s = message
+                done = threading.Event()
+                heartbeat = threading.Thread(target=_heartbeat, args=(sock, lock, heartbeat_s, done), daemon=True)
+                heartbeat.start()
+                try:
+                    _run_chunk(sock, lock, chunk_id, scenarios, kernel)
+                finally:
+                    done.set()
+                    heartbeat.join()
+    except OSError:
+        # the coordinator finished or died, either way there is no more work
+        return
+
+
+class Coordinator:
+    """
+    Serves scenario chunks to workers and merges their results.
+    """
+
+    def __init__(self, scenarios, chunk_size=8, host='127.0.0.1', port=0, lease_s=LEASE_S):
+        """
+        Start listening for workers, chunks are only read from scenarios when needed.
+        """
+        self.scenarios = iter(scenarios)
+        self.chunk_size = chunk_size
+        self.lease_s = lease_s
+        self.chunk_ids = count()
+        self.exhausted = False
+
+        # scenarios not yet returned of every pending or in-flight chunk, by id
+        self.chunks = {}
+        self.pending = deque()
+        # lease deadline per connection running each in-flight chunk, when
+        # the chunk was first handed out and how many times it came back unfinished
+        self.running = {}
+        self.started = {}
+        self.attempts = {}
+        # latest error per scenario and the scenarios given up on, with their error
+        self.errors = {}
+        self.failed = []
+        self.completed = 0
+        self.retried = 0
+        self.stolen = 0
+
+        self._refill()
+
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()[:2]
+
+    @property
+    def finished(self):
+        """
+        Whether every scenario has been read and every chunk returned or given up on.
+        """
+        return self.exhausted and not self.chunks
+
+    def _read_chunk(self):
+        """
+        Read the next chunk from the scenarios, None once they are exhausted.
+        """
+        if self.exhausted:
+            return None
+
+        chunk = list(islice(self.scenarios, self.chunk_size))
+        if not chunk:
+            self.exhausted = True
+            return None
+
+        chunk_id = next(self.chunk_ids)
+        self.chunks[chunk_id] = {scenario.id: scenario for scenario in chunk}
+
+        return chunk_id
+
+    def _refill(self):
+        """
+        Queue the next chunk once nothing is left, so the end of the scenarios is noticed.
+        """
+        if not self.chunks and (chunk_id := self._read_chunk()) is not None:
+            self.pending.append(chunk_id)
+
+    def _next_chunk(self):
+        """
+        Pick the chunk for an idle worker: a pending one, else a new one,
+        else the oldest in-flight chunk that can still be copied, else None.
+        """
+        while self.pending:
+            chunk_id = self.pending.popleft()
+            if chunk_id in self.chunks:
+                return chunk_id
+
+        chunk_id = self._read_chunk()
+        if chunk_id is not None:
+            return chunk_id
+
+        stealable = [chunk_id for chunk_id, leases in self.running.items() if len(leases) < MAX_COPIES]
+        if not stealable:
+            return None
+
+        self.stolen += 1
+
+        return min(stealable, key=self.started.__getitem__)
+
+    def _close(self, chunk_id):
+        """
+        Forget a chunk that is done with and read the next one if needed.
+        """
+        del self.chunks[chunk_id]
+        self.running.pop(chunk_id, None)
+        self.started.pop(chunk_id, None)
+        self.attempts.pop(chunk_id, None)
+        self._refill()
+
+    def _release(self, chunk_id, conn):
+        """
+        End the lease of a connection on a chunk. When nobody else runs it, the
+        chunk is requeued, or its remaining scenarios fail after MAX_ATTEMPTS.
+        """
+        leases = self.running.get(chunk_id)
+        if leases is None or leases.pop(conn, None) is None or leases:
+            return
+
+        del self.running[chunk_id]
+        self.attempts[chunk_id] = self.attempts.get(chunk_id, 0) + 1
+        if self.attempts[chunk_id] < MAX_ATTEMPTS:
+            self.pending.appendleft(chunk_id)
+            self.retried += 1
+            return
+
+        for scenario_id in self.chunks[chunk_id]:
+            self.failed.append((scenario_id, self.errors.pop(scenario_id, f"not returned in {MAX_ATTEMPTS} attempts")))
+        self._close(chunk_id)
+
+    def _renew(self, conn):
+        """
+        Extend the leases of a connection that was just heard from.
+        """
+        deadline = monotonic() + self.lease_s
+        for leases in self.running.values():
+            if conn in leases:
+                leases[conn] = deadline
+
+    def _handle(self, conn, message):
+        """
+        Answer a worker message, return the rows of newly finished scenarios.
+
+        Raises ValueError on messages that do not follow the protocol.
+        """
+        self._renew(conn)
+
+        if message == ['request']:
+            chunk_id = self._next_chunk()
+            if chunk_id is None:
+                send_message(conn, ['stop'] if self.finished else ['wait'])
+                return []
+
+            self.running.setdefault(chunk_id, {})[conn] = monotonic() + self.lease_s
+            self.started.setdefault(chunk_id, monotonic())
+            send_message(conn, ['chunk', chunk_id, [scenario.to_dict() for scenario in self.chunks[chunk_id].values()],
+                                self.lease_s / HEARTBEATS_PER_LEASE])
+            return []
+
+        if message == ['heartbeat']:
+            return []
+
+        if not isinstance(message, list) or len(message) < 2 or not isinstance(message[1], int):
+            raise ValueError(f"Unexpected message {message!r:.100}")
+
+        kind, chunk_id = message[:2]
+        # None once another copy finished the chunk
+        chunk = self.chunks.get(chunk_id)
+
+        if kind == 'row' and len(message) == 3:
+            row = message[2]
+            if not (isinstance(row, dict) and set(row) == set(COLUMNS) and isinstance(row['id'], str)):
+                raise ValueError(f"Malformed result row for chunk {chunk_id}")
+
+            if chunk is None or chunk.pop(row['id'], None) is None:
+                return []
+
+            self.errors.pop(row['id'], None)
+            if not chunk:
+                self.completed += 1
+                self._close(chunk_id)
+
+            return [row]
+
+        if kind == 'error' and len(message) == 4:
+            scenario_id = message[2]
+            if chunk is not None and isinstance(scenario_id, str) and scenario_id in chunk:
+                self.errors[scenario_id] = str(message[3])
+            return []
+
+        if kind == 'done' and len(message) == 2:
+            self._release(chunk_id, conn)
+            return []
+
+        raise ValueError(f"Unexpected message {message!r:.100}")
+
+    def _expire_leases(self):
+        """
+        Requeue the chunks whose every lease has run out.
+        """
+        now = monotonic()
+        for chunk_id, leases in list(self.running.items()):
+            for conn, deadline in list(leases.items()):
+                if deadline <= now:
+                    self._release(chunk_id, conn)
+
+    def _drop(self, conn, buffers, selector):
+        """
+        Forget a lost worker and requeue the chunks nobody else is running.
+        """
+        selector.unregister(conn)
+        conn.close()
+        del buffers[conn]
+
+        for chunk_id in [chunk_id for chunk_id, leases in self.running.items() if conn in leases]:
+            self._release(chunk_id, conn)
+
+    def results(self, idle_timeout=None):
+        """
+        Yield result rows as scenarios finish, until every chunk is done.
+
+        Reads are buffered per connection so a stalled peer cannot block the
+        others. Raises TimeoutError when no chunk is running and nothing
+        arrives for idle_timeout seconds.
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(self.server, selectors.EVENT_READ)
+        buffers = {}
+        last_event = monotonic()
+
+        try:
+            while not self.finished:
+                events = selector.select(timeout=min(1.0, self.lease_s))
+                self._expire_leases()
+                # workers on long chunks are busy, not idle
+                if events or self.running:
+                    last_event = monotonic()
+                elif idle_timeout is not None and monotonic() - last_event > idle_timeout:
+                    raise TimeoutError(f"No worker activity for {idle_timeout} seconds")
+
+                for key, _ in events:
+                    if key.fileobj is self.server:
+                        conn, _ = self.server.accept()
+                        # recv only runs on ready connections, the timeout bounds sends to stalled peers
+                        conn.settimeout(SEND_TIMEOUT_S)
+                        selector.register(conn, selectors.EVENT_READ)
+                        buffers[conn] = bytearray()
+                        continue
+
+                    conn = key.fileobj
+                    try:
+                        block = conn.recv(RECV_BYTES)
+                        if not block:
+                            self._drop(conn, buffers, selector)
+                            continue
+
+                        buffers[conn].extend(block)
+                        for message in read_frames(buffers[conn]):
+                            yield from self._handle(conn, message)
+                    except (OSError, ValueError):
+                        self._drop(conn, buffers, selector)
+        finally:
+            for conn in list(buffers):
+                try:
+                    send_message(conn, ['stop'])
+                except OSError:
+                    pass
+                conn.close()
+            selector.close()
+            self.server.close()
+
+
+def serve_manifest(manifest, output, host, port, chunk_size=8, replications=1, lease_s=LEASE_S):
+    """
+    Coordinate a manifest over remote workers, appending rows to the output as they arrive.
+
+    Like run_batch, the manifest is validated up front, scenarios already in
+    the output are skipped and the manifest is read as chunks are handed
+    out. Returns the number of scenarios run and skipped and the
+    (scenario id, error) pairs of the scenarios that failed on every attempt.
+    """
+    validate_manifest(manifest)
+    writer_cls = result_writer(output)
+    completed = writer_cls.completed_ids(output)
+    scenarios = read_manifest(manifest)
+    if replications > 1:
+        scenarios = replicate(scenarios, replications)
+
+    coordinator = Coordinator((scenario for scenario in scenarios if scenario.id not in completed),
+                              chunk_size, host, port, lease_s)
+    ran = 0
+    writer = writer_cls(output)
+    try:
+        for row in coordinator.results():
+            writer.write([row])
+            ran += 1
+    finally:
+        writer.close()
+
+    return ran, len(completed), coordinator.failed
+
+
+class LocalCluster:
+    """
+    Coordinator and worker processes on the loopback interface.
+    """
+
+    def __init__(self, workers=2, kernel=False):
+        """
+        Initialize the cluster.
+        """
+        self.workers = workers
+        self.kernel = kernel
+        self.failed = []
+
+    def run(self, scenarios, chunk_size=8, idle_timeout=60, lease_s=LEASE_S):
+        """
+        Run every scenario and yield the result rows as they come in, the
+        (scenario id, error) pairs of the scenarios that failed on every
+        attempt are in failed.
+        """
+        coordinator = Coordinator(scenarios, chunk_size, lease_s=lease_s)
+        self.failed = coordinator.failed
+        # spawned like remote workers, a forked one would inherit the listening socket
+        # and keep connections made after the run open forever
+        context = get_context('spawn')
+        processes = [context.Process(target=run_worker, args=(*coordinator.address, self.kernel), daemon=True)
+                     for _ in range(self.workers)]
+        for process in processes:
+            process.start()
+
+        try:
+            yield from coordinator.results(idle_timeout)
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
@@ -0,0 +1,159 @@
+"""
+Online estimators for the mining simulation.
+
+This module defines the RunningStats class which keeps the mean and variance
+of a stream of observations in constant memory, and the BatchMeans class
+which builds steady-state confidence intervals on top of it. Intervals use
+Student's t quantiles, so they stay honest with few observations.
+"""
+
+from functools import lru_cache
+from math import atan, cos, pi, sin, sqrt
+from statistics import NormalDist
+
+# degrees of freedom above which the t quantile comes from its expansion around the normal one
+T_SERIES_MAX_DF = 30
+
+
+def _t_central_probability(t, df):
+    """
+    P(|T| <= t) for Student's t with integer degrees of freedom, from its closed form.
+    """
+    theta = atan(t / sqrt(df))
+    cos_squared = cos(theta) ** 2
+    # the series runs over the even powers of cos(theta) below df - 1
+    if df % 2:
+        term = 1.0
+        total = 1.0 if df > 1 else 0.0
+        for k in range(1, (df - 1) // 2):
+            term *= cos_squared * 2 * k / (2 * k + 1)
+            total += term
+        return 2 / pi * (theta + sin(theta) * cos(theta) * total)
+
+    term, total = 1.0, 1.0
+    for k in range(1, df // 2):
+        term *= cos_squared * (2 * k - 1) / (2 * k)
+        total += term
+    return sin(theta) * total
+
+
+@lru_cache(maxsize=256)
+def t_quantile(confidence, df):
+    """
+    Two-sided Student's t quantile: the t with P(|T| <= t) = confidence.
+
+    Exact up to T_SERIES_MAX_DF degrees of freedom by bisection on the closed
+    form distribution, above it the Cornish-Fisher expansion around the
+    normal quantile, which is accurate to well under 0.1%.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    if df > T_SERIES_MAX_DF:
+        return (z + (z ** 3 + z) / (4 * df)
+                + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+                + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+    low, high = z, 2 * z
+    while _t_central_probability(high, df) < confidence:
+        low, high = high, 2 * high
+    for _ in range(60):
+        middle = (low + high) / 2
+        if _t_central_probability(middle, df) < confidence:
+            low = middle
+        else:
+            high = middle
+
+    return (low + high) / 2
+
+
+class RunningStats:
+    """
+    Mean and variance of a stream of observations using Welford's algorithm.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty statistics.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self._squares = 0.0
+
+    def push(self, value):
+        """
+        Add an observation.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._squares += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        """
+        Sample variance of the observations.
+        """
+        if self.count < 2:
+            return 0.0
+
+        return self._squares / (self.count - 1)
+
+    def half_width(self, confidence=0.95):
+        """
+        Half width of the confidence interval on the mean.
+        """
+        if self.count < 2:
+            return float('inf')
+
+        return t_quantile(confidence, self.count - 1) * sqrt(self.variance / self.count)
+
+
+class BatchMeans:
+    """
+    Batch means estimator of a steady-state mean.
+
+    Consecutive observations are grouped into batches of batch_size and the
+    batch means are treated as independent samples, which gives valid
+    confidence intervals from a single long run of autocorrelated output.
+    Memory use is constant.
+    """
+
+    def __init__(self, batch_size=1):
+        """
+        Initialize an empty estimator.
+        """
+        self.batch_size = batch_size
+        self.batches = RunningStats()
+        self._batch_total = 0.0
+        self._batch_count = 0
+
+    def push(self, value):
+        """
+        Add an observation, closing the current batch once it is full.
+        """
+        self._batch_total += value
+        self._batch_count += 1
+
+        if self._batch_count == self.batch_size:
+            self.batches.push(self._batch_total / self.batch_size)
+            self._batch_total = 0.0
+            self._batch_count = 0
+
+    @property
+    def count(self):
+        """
+        Number of completed batches.
+        """
+        return self.batches.count
+
+    @property
+    def mean(self):
+        """
+        Mean over the completed batches.
+        """
+        return self.batches.mean
+
+    def half_width(self, confidence=0.95):
+        """
+        Half width of the confidence interval on the steady-state mean.
+        """
+        return self.batches.half_width(confidence)
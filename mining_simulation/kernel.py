@@ -0,0 +1,394 @@
+"""
+Integer-encoded kernel for the mining simulation.
+
+This module defines the TruckKernel class which runs the truck state machine
+and the station queue processing over flat integer arrays instead of
+MiningTruck and UnloadStation objects. The kernel functions are compiled with
+Numba when it is installed and otherwise run as plain Python, with identical
+results either way.
+"""
+
+from operator import attrgetter
+from mining_simulation.constants import PRIORITY_CLASSES
+from mining_simulation.models.truck import TruckState
+from mining_simulation.models.station import UnloadStationState
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+# truck states, same values as TruckState
+MINING = TruckState.MINING.value
+TRAVELING = TruckState.TRAVELING.value
+UNLOADING = TruckState.UNLOADING.value
+WAITING = TruckState.WAITING.value
+
+# station states, same values as UnloadStationState
+FREE = UnloadStationState.FREE.value
+OCCUPIED = UnloadStationState.OCCUPIED.value
+
+# truck locations, a truck at the mining or traveling location shares the
+# code of its state, ARRIVED trucks are waiting to be assigned a station
+LOC_MINING = MINING
+LOC_TRAVELING = TRAVELING
+LOC_ARRIVED = UNLOADING
+LOC_QUEUED = 3
+
+# row widths and column offsets of the flat performance arrays
+TRUCK_STATES = len(TruckState)
+TRUCK_PERF_WIDTH = TRUCK_STATES + 1
+TRUCK_DELIVERED = TRUCK_STATES
+STATION_PERF_WIDTH = len(UnloadStationState) + 1
+STATION_UNLOADED = len(UnloadStationState)
+
+NO_TRUCK = -1
+
+
+def _compile(func):
+    """
+    Compile a kernel function with Numba when available.
+    """
+    if NUMBA_AVAILABLE:
+        return njit(cache=True)(func)
+
+    return func
+
+
+def _zeros(size):
+    """
+    Allocate an integer array in the representation the kernel runs fastest on.
+    """
+    if NUMBA_AVAILABLE:
+        return np.zeros(size, dtype=np.int64)
+
+    return [0] * size
+
+
+@_compile
+def _state_change(t, truck_state, empty, perf_truck):
+    """
+    Integer version of MiningTruck.state_change.
+    """
+    state = truck_state[t]
+    if state == MINING:
+        truck_state[t] = TRAVELING
+        empty[t] = 0
+    elif state == TRAVELING:
+        if empty[t]:
+            truck_state[t] = MINING
+        else:
+            truck_state[t] = UNLOADING
+    elif state == UNLOADING:
+        truck_state[t] = TRAVELING
+        perf_truck[t * TRUCK_PERF_WIDTH + TRUCK_DELIVERED] += 1
+        empty[t] = 1
+    else:
+        truck_state[t] = UNLOADING
+
+
+@_compile
+def _truck_pass_time(t, interval, truck_state, time_left, empty, durations, perf_truck):
+    """
+    Integer version of MiningTruck.pass_time.
+    """
+    state = truck_state[t]
+    perf_truck[t * TRUCK_PERF_WIDTH + state] += interval
+
+    if state != WAITING:
+        time_left[t] -= interval
+
+        if time_left[t] <= 0:
+            _state_change(t, truck_state, empty, perf_truck)
+            time_left[t] = durations[t * TRUCK_STATES + truck_state[t]]
+    else:
+        time_left[t] = durations[t * TRUCK_STATES + WAITING]
+
+
+@_compile
+def _before(a, b, busy_until, clock):
+    """
+    Whether station a has a shorter expected wait than station b, ties go to the lower index.
+    """
+    wait_a = max(busy_until[a], clock)
+    wait_b = max(busy_until[b], clock)
+    return wait_a < wait_b or (wait_a == wait_b and a < b)
+
+
+@_compile
+def _siftdown(heap, busy_until, clock, startpos, pos):
+    """
+    Array version of heapq._siftdown, ordering stations by their expected wait.
+    """
+    newitem = heap[pos]
+    while pos > startpos:
+        parentpos = (pos - 1) >> 1
+        parent = heap[parentpos]
+        if _before(newitem, parent, busy_until, clock):
+            heap[pos] = parent
+            pos = parentpos
+            continue
+        break
+    heap[pos] = newitem
+
+
+@_compile
+def _siftup(heap, busy_until, clock, size, pos):
+    """
+    Array version of heapq._siftup, ordering stations by their expected wait.
+    """
+    startpos = pos
+    newitem = heap[pos]
+    childpos = 2 * pos + 1
+    while childpos < size:
+        rightpos = childpos + 1
+        if rightpos < size and not _before(heap[childpos], heap[rightpos], busy_until, clock):
+            childpos = rightpos
+        heap[pos] = heap[childpos]
+        pos = childpos
+        childpos = 2 * pos + 1
+    heap[pos] = newitem
+    _siftdown(heap, busy_until, clock, startpos, pos)
+
+
+@_compile
+def _advance(ticks, interval, clock,
+             truck_state, time_left, empty, durations, truck_loc, moving, next_truck, perf_truck,
+             heap, busy_until, front_until, station_state, head, tail, perf_station):
+    """
+    Advance the whole simulation by a number of ticks and return the new station clock.
+
+    Every tick mirrors one iteration of Simulator.start: trucks at the mining
+    and traveling locations pass time, arrived trucks are assigned to the
+    station with the shortest expected wait, stations process their queues
+    and finally departing trucks move to their next location. Only first
+    come first served trucks run here, so busy_until holds the priority class
+    0 estimate and front_until the one of the classes above, which are only
+    held up by the unloading truck.
+    """
+    trucks = len(truck_state)
+    stations = len(heap)
+
+    for _ in range(ticks):
+        # mining and traveling locations
+        for t in range(trucks):
+            loc = truck_loc[t]
+            if loc == LOC_MINING or loc == LOC_TRAVELING:
+                _truck_pass_time(t, interval, truck_state, time_left, empty, durations, perf_truck)
+                if truck_state[t] != loc:
+                    moving[t] = 1
+
+        # unloading stations location, arrivals are assigned in truck order
+        if stations:
+            for t in range(trucks):
+                if truck_loc[t] != LOC_ARRIVED:
+                    continue
+
+                # add_truck on the station with the shortest expected wait
+                s = heap[0]
+                work = durations[t * TRUCK_STATES + UNLOADING]
+                if head[s] != NO_TRUCK:
+                    truck_state[t] = WAITING
+                    next_truck[tail[s]] = t
+                else:
+                    head[s] = t
+                    front_until[s] = max(front_until[s], clock) + work
+                tail[s] = t
+                busy_until[s] = max(busy_until[s], clock) + work
+                station_state[s] = OCCUPIED
+                truck_loc[t] = LOC_QUEUED
+
+                # its wait only grew, move it down the heap
+                if stations > 1:
+                    _siftup(heap, busy_until, clock, stations, 0)
+
+        clock += interval
+        for s in range(stations):
+            perf_station[s * STATION_PERF_WIDTH + station_state[s]] += interval
+
+            if station_state[s] == OCCUPIED:
+                t = head[s]
+                while t != NO_TRUCK:
+                    _truck_pass_time(t, interval, truck_state, time_left, empty, durations, perf_truck)
+                    t = next_truck[t]
+
+                # unload_check
+                t = head[s]
+                if t != NO_TRUCK and truck_state[t] == TRAVELING:
+                    perf_station[s * STATION_PERF_WIDTH + STATION_UNLOADED] += 1
+                    head[s] = next_truck[t]
+                    next_truck[t] = NO_TRUCK
+                    moving[t] = 1
+
+                    if head[s] != NO_TRUCK:
+                        _state_change(head[s], truck_state, empty, perf_truck)
+                        front_until[s] = max(front_until[s], clock) + durations[head[s] * TRUCK_STATES + UNLOADING]
+                    else:
+                        tail[s] = NO_TRUCK
+
+            # state_change
+            if head[s] != NO_TRUCK:
+                station_state[s] = OCCUPIED
+            else:
+                station_state[s] = FREE
+                busy_until[s] = clock
+                front_until[s] = clock
+
+        # heapify, the expected waits moved with the clock
+        for i in range(stations // 2 - 1, -1, -1):
+            _siftup(heap, busy_until, clock, stations, i)
+
+        # resolve departures, a location code matches the state of the truck
+        for t in range(trucks):
+            if moving[t]:
+                moving[t] = 0
+                truck_loc[t] = truck_state[t]
+
+    return clock
+
+
+class TruckKernel:
+    """
+    Integer-encoded copy of a simulation's trucks, stations and locations.
+
+    The kernel is packed from the objects of a Simulator, advanced any number
+    of ticks and unpacked back into the same objects, so metrics gathering and
+    everything downstream works unchanged.
+    """
+
+    def __init__(self, locations):
+        """
+        Pack the trucks and stations held by a simulator's locations.
+        """
+        self.locations = locations
+        self.stations = locations[TruckState.UNLOADING].stations
+        # station order matches the id tie-break used by UnloadingStations
+        self.packed_stations = sorted(self.stations, key=attrgetter('id'))
+        self.clock = self.packed_stations[0].clock if self.packed_stations else 0
+
+        placed = []
+        for state in (TruckState.MINING, TruckState.TRAVELING):
+            placed.extend((truck, state.value, None) for truck in locations[state].current)
+        placed.extend((truck, LOC_ARRIVED, None) for truck in locations[TruckState.UNLOADING].current)
+        for s, station in enumerate(self.packed_stations):
+            placed.extend((truck, LOC_QUEUED, s) for truck in station.queue)
+
+        # truck order matches the arrival order used by UnloadingStations
+        placed.sort(key=lambda entry: entry[0].id)
+        self.trucks = [truck for truck, _, _ in placed]
+        index = {truck: t for t, truck in enumerate(self.trucks)}
+
+        trucks_amt = len(self.trucks)
+        self.truck_state = _zeros(trucks_amt)
+        self.time_left = _zeros(trucks_amt)
+        self.empty = _zeros(trucks_amt)
+        self.durations = _zeros(trucks_amt * TRUCK_STATES)
+        self.truck_loc = _zeros(trucks_amt)
+        self.moving = _zeros(trucks_amt)
+        self.next_truck = _zeros(trucks_amt)
+        self.perf_truck = _zeros(trucks_amt * TRUCK_PERF_WIDTH)
+
+        for t, (truck, loc, _) in enumerate(placed):
+            self.truck_state[t] = truck.state.value
+            self.time_left[t] = truck.time_left
+            self.empty[t] = int(truck.empty)
+            self.truck_loc[t] = loc
+            self.next_truck[t] = NO_TRUCK
+            for state, minutes in truck.state_time_minutes_map.items():
+                self.durations[t * TRUCK_STATES + state.value] = minutes
+            for state in TruckState:
+                self.perf_truck[t * TRUCK_PERF_WIDTH + state.value] = truck.performance[state]
+            self.perf_truck[t * TRUCK_PERF_WIDTH + TRUCK_DELIVERED] = truck.performance["delivered"]
+
+        stations_amt = len(self.packed_stations)
+        self.heap = _zeros(stations_amt)
+        self.busy_until = _zeros(stations_amt)
+        self.front_until = _zeros(stations_amt)
+        self.station_state = _zeros(stations_amt)
+        self.head = _zeros(stations_amt)
+        self.tail = _zeros(stations_amt)
+        self.perf_station = _zeros(stations_amt * STATION_PERF_WIDTH)
+
+        for s, station in enumerate(self.packed_stations):
+            self.heap[s] = s
+            self.busy_until[s] = station.busy_until[0]
+            self.front_until[s] = station.busy_until[-1]
+            self.station_state[s] = station.state.value
+            self.head[s] = NO_TRUCK
+            self.tail[s] = NO_TRUCK
+            for state in UnloadStationState:
+                self.perf_station[s * STATION_PERF_WIDTH + state.value] = station.performance[state]
+            self.perf_station[s * STATION_PERF_WIDTH + STATION_UNLOADED] = station.performance["unloaded"]
+
+            for truck in station.queue:
+                t = index[truck]
+                if self.head[s] == NO_TRUCK:
+                    self.head[s] = t
+                else:
+                    self.next_truck[self.tail[s]] = t
+                self.tail[s] = t
+
+        for i in range(stations_amt // 2 - 1, -1, -1):
+            _siftup(self.heap, self.busy_until, self.clock, stations_amt, i)
+
+    def advance(self, ticks, interval):
+        """
+        Advance the packed simulation by a number of ticks of the given interval.
+        """
+        self.clock = int(_advance(ticks, interval, self.clock,
+                                  self.truck_state, self.time_left, self.empty, self.durations,
+                                  self.truck_loc, self.moving, self.next_truck, self.perf_truck,
+                                  self.heap, self.busy_until, self.front_until, self.station_state,
+                                  self.head, self.tail, self.perf_station))
+
+    def totals(self):
+        """
+        Totals of every truck and station KPI, keyed like SimulationResults.totals.
+        """
+        totals = {}
+        for state in TruckState:
+            totals[state.name.lower()] = int(sum(self.perf_truck[state.value::TRUCK_PERF_WIDTH]))
+        totals['delivered'] = int(sum(self.perf_truck[TRUCK_DELIVERED::TRUCK_PERF_WIDTH]))
+        for state in UnloadStationState:
+            totals[state.name.lower()] = int(sum(self.perf_station[state.value::STATION_PERF_WIDTH]))
+        totals['unloaded'] = int(sum(self.perf_station[STATION_UNLOADED::STATION_PERF_WIDTH]))
+
+        return totals
+
+    def unpack(self):
+        """
+        Write the packed state back into the trucks, stations and locations.
+        """
+        for location in self.locations.values():
+            location.current = set()
+
+        for t, truck in enumerate(self.trucks):
+            truck.state = TruckState(int(self.truck_state[t]))
+            truck.time_left = int(self.time_left[t])
+            truck.empty = bool(self.empty[t])
+            for state in TruckState:
+                truck.performance[state] = int(self.perf_truck[t * TRUCK_PERF_WIDTH + state.value])
+            truck.performance["delivered"] = int(self.perf_truck[t * TRUCK_PERF_WIDTH + TRUCK_DELIVERED])
+
+            loc = int(self.truck_loc[t])
+            if loc != LOC_QUEUED:
+                self.locations[TruckState(loc)].current.add(truck)
+
+        for s, station in enumerate(self.packed_stations):
+            station.state = UnloadStationState(int(self.station_state[s]))
+            station.clock = self.clock
+            station.busy_until = [int(self.busy_until[s])] + [int(self.front_until[s])] * (PRIORITY_CLASSES - 1)
+            for state in UnloadStationState:
+                station.performance[state] = int(self.perf_station[s * STATION_PERF_WIDTH + state.value])
+            station.performance["unloaded"] = int(self.perf_station[s * STATION_PERF_WIDTH + STATION_UNLOADED])
+
+            station.queue.clear()
+            t = int(self.head[s])
+            while t != NO_TRUCK:
+                station.queue.append(self.trucks[t])
+                t = int(self.next_truck[t])
+
@@ -2,9 +2,13 @@
 Main file for running the mining truck simulation.
 
 Provides functions to run the simulation and display results.
+
+The CLI is called many times from scripts and schedulers, so nothing beyond
+what a command needs is imported: the simulator, batch runner, optimizer,
+monitors and any optional compiled or columnar backends are imported inside
+the functions that use them.
 """
 
-from mining_simulation.simulator import Simulator
 import argparse
 
 def parse_args():
@@ -15,15 +19,81 @@ def parse_args():
     parser.add_argument('--trucks', type=int, default=7, help='Number of trucks')
     parser.add_argument('--stations', type=int, default=3, help='Number of unloading stations')
     parser.add_argument('--hours', type=int, default=72, help='Simulation duration in hours')
-    return parser.parse_args()
+    parser.add_argument('--kernel', action='store_true', help='Run on the integer-encoded kernel, compiled with Numba when installed')
+    parser.add_argument('--priority-trucks', type=int, default=0, help='Number of trucks unloaded ahead of the others at stations')
+    parser.add_argument('--reservations', action='store_true', help='Loaded trucks reserve a station as they leave the mining site')
+    parser.add_argument('--warmup-hours', type=int, default=0, help='Leave the first hours out of the metrics')
+    parser.add_argument('--batch-means', action='store_true', help='Report steady-state estimates with 95%% confidence intervals')
+    parser.add_argument('--manifest', help='Run every scenario of a JSONL or CSV manifest instead of a single simulation')
+    parser.add_argument('--output', default='results.csv', help='Batch output file, .csv or .parquet (a directory of part files)')
+    parser.add_argument('--workers', type=int, help='Batch worker processes, defaults to the number of CPUs')
+    parser.add_argument('--chunksize', type=int, default=16, help='Scenarios dispatched to a worker at a time')
+    parser.add_argument('--serve', metavar='HOST:PORT', help='Coordinate the --manifest scenarios over workers connecting to this address')
+    parser.add_argument('--connect', metavar='HOST:PORT', help='Run as a worker of the coordinator at this address')
+    parser.add_argument('--lease-seconds', type=float, default=60, help='Seconds a --serve worker may stay silent before its chunk is handed out again')
+    parser.add_argument('--replications', type=int, default=1, help='Replications of every --serve scenario, with consecutive seeds')
+    parser.add_argument('--optimize', action='store_true', help='Search for the cheapest fleet meeting --target-loads and --max-wait')
+    parser.add_argument('--target-loads', type=float, help='Loads per day the fleet has to deliver')
+    parser.add_argument('--max-wait', type=float, default=5, help='Highest average wait per delivery in minutes')
+    parser.add_argument('--truck-cost', type=float, default=1, help='Cost of a truck')
+    parser.add_argument('--station-cost', type=float, default=1, help='Cost of a station')
+    parser.add_argument('--trajectory', help='Record every truck trajectory to this file for later replay')
+    parser.add_argument('--progress', action='store_true', help='Report progress while the simulation runs')
+    parser.add_argument('--max-seconds', type=float, help='Stop once this wall clock budget is spent')
+    parser.add_argument('--ci-width', type=float, help='Stop once the 95%% confidence interval half width on deliveries per hour is below this')
+    parser.add_argument('--ci-batch-hours', type=int, help='Hours per batch of the --ci-width interval, defaults to the longest truck cycle')
+    parser.add_argument('--steady-state', action='store_true', help='Stop once the delivery rate reaches steady state')
+    args = parser.parse_args()
+
+    if args.warmup_hours and args.warmup_hours >= args.hours:
+        parser.error(f"--warmup-hours ({args.warmup_hours}) must be shorter than --hours ({args.hours})")
+    if args.kernel and (args.priority_trucks or args.reservations):
+        parser.error("--kernel does not support --priority-trucks or --reservations")
+    if args.kernel and args.trajectory:
+        parser.error("--kernel does not support --trajectory")
+
+    return args
+
+def build_monitors(args):
+    """
+    Build the trajectory recorder, progress reporter, stopping rules and
+    steady-state statistics requested on the command line.
+    """
+    monitors = []
+    statistics = None
+    if args.trajectory:
+        from mining_simulation.trajectory import TrajectoryRecorder
+
+        monitors.append(TrajectoryRecorder(args.trajectory))
 
-def display_results(metrics):
+    if not (args.progress or args.max_seconds is not None or args.ci_width is not None
+            or args.steady_state or args.batch_means):
+        return monitors, statistics
+
+    from mining_simulation.monitoring import (ProgressReporter, WallClockBudget, ConfidenceInterval,
+                                              SteadyState, SteadyStateStatistics)
+
+    if args.progress:
+        monitors.append(ProgressReporter())
+    if args.max_seconds is not None:
+        monitors.append(WallClockBudget(args.max_seconds))
+    if args.ci_width is not None:
+        monitors.append(ConfidenceInterval(args.ci_width, batch_size=args.ci_batch_hours))
+    if args.steady_state:
+        monitors.append(SteadyState())
+    if args.batch_means:
+        statistics = SteadyStateStatistics()
+        monitors.append(statistics)
+
+    return monitors, statistics
+
+def display_results(results):
     """
     Display the simulation results in a readable format.
 
     """
     print("\nTruck Performance:")
-    for truck in sorted(metrics['trucks'], key=lambda x: x['id']):
+    for truck in results.trucks.sorted('id'):
         print(f"\nTruck {truck['id']}:")
         print(f"  Deliveries: {truck['delivered']}")
         print(f"  Mining time: {truck['mining']} minutes")
@@ -32,23 +102,95 @@ def display_results(metrics):
         print(f"  Waiting time: {truck['waiting']} minutes")
 
     print("\nStation Performance:")
-    for station in sorted(metrics['stations'], key=lambda x: x['id']):
+    for station in results.stations.sorted('id'):
         print(f"\nStation {station['id']}:")
         print(f"  Total unloaded: {station['unloaded']}")
         print(f"  Time occupied: {station['occupied']} minutes")
         print(f"  Time free: {station['free']} minutes")
 
+def display_estimates(statistics):
+    """
+    Display steady-state estimates per hour with their confidence intervals.
+    """
+    print("\nSteady-state estimates per hour (95% confidence):")
+    for kpi, (mean, half_width) in statistics.summary().items():
+        print(f"  {kpi}: {mean:.2f} +/- {half_width:.2f}")
+
 def main():
     args = parse_args()
+
+    if args.connect:
+        from mining_simulation.distributed import run_worker
+
+        host, port = args.connect.rsplit(':', 1)
+        run_worker(host, int(port), kernel=args.kernel)
+        return
+
+    if args.manifest and args.serve:
+        from mining_simulation.distributed import serve_manifest
+
+        host, port = args.serve.rsplit(':', 1)
+        try:
+            ran, completed, failed = serve_manifest(args.manifest, args.output, host, int(port),
+                                                    chunk_size=args.chunksize, replications=args.replications,
+                                                    lease_s=args.lease_seconds)
+        except ValueError as error:
+            raise SystemExit(str(error))
+        print(f"Ran {ran} scenarios, {completed} already completed in {args.output}")
+        for scenario_id, error in failed:
+            print(f"Scenario {scenario_id} failed: {error}")
+        return
+
+    if args.manifest:
+        from mining_simulation.batch import run_batch
+
+        try:
+            ran, completed = run_batch(args.manifest, args.output, workers=args.workers,
+                                       chunksize=args.chunksize, kernel=args.kernel)
+        except ValueError as error:
+            raise SystemExit(str(error))
+        print(f"Ran {ran} scenarios, {completed} already completed in {args.output}")
+        return
+
+    if args.optimize:
+        if args.target_loads is None:
+            raise SystemExit("--optimize requires --target-loads")
+
+        from mining_simulation.optimize import FleetOptimizer
+
+        optimizer = FleetOptimizer(args.target_loads, args.max_wait,
+                                   max_trucks=args.trucks, max_stations=args.stations,
+                                   truck_cost=args.truck_cost, station_cost=args.station_cost,
+                                   max_hours=args.hours, warmup_hours=args.warmup_hours or None,
+                                   priority_trucks=args.priority_trucks, reservations=args.reservations)
+        best = optimizer.run(workers=args.workers)
+        print(f"Ran {optimizer.simulations} simulations")
+        print(f"Cheapest fleet: {best}" if best else "No fleet within --trucks and --stations meets the target")
+        return
+
+    from mining_simulation.simulator import Simulator
+
+    monitors, statistics = build_monitors(args)
     
     with Simulator(trucks_amt=args.trucks, 
                   unload_stations_amt=args.stations, 
-                  simulation_hrs=args.hours) as sim:
-        sim.start()
-        metrics = sim.performance_data
-        
+                  simulation_hrs=args.hours,
+                  warmup_hrs=args.warmup_hours,
+                  priority_trucks=args.priority_trucks,
+                  reservations=args.reservations) as sim:
+        try:
+            sim.start(kernel=args.kernel, monitors=monitors)
+        except RuntimeError as error:
+            raise SystemExit(str(error))
+
+    if sim.stopped_by is not None:
+        print(f"\nStopped at minute {sim.minute} by {type(sim.stopped_by).__name__}")
+
     # Print or save results
-    display_results(metrics)
+    display_results(sim.results)
+
+    if statistics is not None:
+        display_estimates(statistics)
 
 
 
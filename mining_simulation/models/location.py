@@ -6,6 +6,7 @@ trucks at different locations in the simulation.
 """
 
 import heapq
+from operator import attrgetter
 from mining_simulation.constants import PASS_TIME_MIN
 from mining_simulation.models.truck import TruckState
 
@@ -67,16 +68,43 @@ class UnloadingStations(Location):
         """
         Advance time for all trucks and stations at this location.
         
-        Assigns incoming trucks to stations based on queue length,
-        processes unloading at stations, and identifies trucks that
-        have completed unloading.
+        Assigns incoming trucks to the station with the shortest expected wait
+        for their priority class, processes unloading at stations, and
+        identifies trucks that have completed unloading. Incoming trucks are
+        assigned in id order and ties go to the lowest station id so runs are
+        reproducible, trucks with a reservation go to their reserved station.
         """
-        for item in self.current:
-            unloading_station = heapq.heappop(self.stations)
+        arrivals = sorted(self.current, key=attrgetter('id'))
+        if any(item.reserved_station is not None for item in arrivals):
+            unreserved = []
+            for item in arrivals:
+                if item.reserved_station is None:
+                    unreserved.append(item)
+                    continue
+
+                wait_time = item.state_time_minutes_map[self.location_state]
+                item.reserved_station.add_truck(item, wait_time)
+                item.reserved_station = None
+
+            arrivals = unreserved
+
+        # one heap of (expected wait, station id, station) per priority class seen
+        # this tick, entries outdated by an arrival are dropped when they surface
+        heaps = {}
+        for item in arrivals:
+            if item.priority not in heaps:
+                heaps[item.priority] = self.ranked(item.priority)
+            heap = heaps[item.priority]
+            while heap[0][0] != heap[0][2].expected_wait(heap[0][2].clock, item.priority):
+                heapq.heappop(heap)
+
+            unloading_station = heap[0][2]
             wait_time = item.state_time_minutes_map[self.location_state]
             unloading_station.add_truck(item, wait_time)
 
-            heapq.heappush(self.stations, unloading_station)
+            for priority, heap in heaps.items():
+                heapq.heappush(heap, (unloading_station.expected_wait(unloading_station.clock, priority),
+                                      unloading_station.id, unloading_station))
 
         self.current = set()
 
@@ -85,4 +113,19 @@ class UnloadingStations(Location):
             if traveling_truck:
                 self.leaving.add(traveling_truck)
 
-        heapq.heapify(self.stations)
\ No newline at end of file
+    def ranked(self, priority):
+        """
+        Heap of the stations keyed on the expected wait of a priority class arriving now.
+        """
+        heap = [(station.expected_wait(station.clock, priority), station.id, station) for station in self.stations]
+        heapq.heapify(heap)
+
+        return heap
+
+    def reserve(self, truck, eta):
+        """
+        Reserve the station with the shortest expected wait for a truck arriving at minute eta.
+        """
+        station = min(self.stations, key=lambda station: station.expected_wait(eta, truck.priority))
+        station.reserve(truck, eta)
+        truck.reserved_station = station
\ No newline at end of file
@@ -7,7 +7,7 @@ the unloading of resources from mining trucks.
 
 from enum import Enum
 from collections import deque
-from mining_simulation.constants import PASS_TIME_MIN
+from mining_simulation.constants import PASS_TIME_MIN, PRIORITY_CLASSES
 from mining_simulation.models.truck import TruckState
 
 
@@ -28,6 +28,12 @@ class UnloadStation:
     Represents a station where trucks unload their collected resources.
     
     Manages a queue of trucks and processes them according to simulation rules.
+    Waiting trucks are ordered by priority class, first come first served within
+    a class, and trucks still traveling can reserve the station ahead of arrival.
+
+    The expected completion time of the work committed for each priority class
+    and above is kept up to date on every arrival and reservation, so estimating
+    the wait of a new truck never scans the queue.
     """
     _next_id = 0
     def __init__(self):
@@ -37,17 +43,15 @@ class UnloadStation:
         self.id = UnloadStation._next_id
         self.state = UnloadStationState.FREE
         self.queue = deque()
-        self.queue_time = 0
+        self.clock = 0
+        # expected completion minute of the work committed by each class and above
+        self.busy_until = [0] * PRIORITY_CLASSES
+        # reserved trucks and their expected arrival minute
+        self.reservations = {}
 
         self.performance = {state: 0 for state in UnloadStationState}
         self.performance["unloaded"] = 0
         UnloadStation._next_id += 1
-        
-    def __lt__(self, other):
-        """
-        Comparison operator for station priority.
-        """
-        return self.queue_time < other.queue_time
 
     def state_change(self):
         """
@@ -59,7 +63,8 @@ class UnloadStation:
             self.state = UnloadStationState.OCCUPIED
         else:
             self.state = UnloadStationState.FREE
-            self.queue_time = 0
+            if not self.reservations:
+                self.busy_until = [self.clock] * PRIORITY_CLASSES
 
     def pass_time(self, interval=PASS_TIME_MIN):
         """
@@ -69,11 +74,10 @@ class UnloadStation:
         returns any truck that has completed unloading.
         """
         self.performance[self.state] += interval
+        self.clock += interval
         unloaded_truck = None
 
         if self.state == UnloadStationState.OCCUPIED:
-            self.queue_time -= interval
-
             for truck in self.queue:
                 truck.pass_time(interval)
             
@@ -97,15 +101,51 @@ class UnloadStation:
             Truck = self.queue.popleft()
 
             if self.queue:
-                self.queue[0].state_change()
+                front = self.queue[0]
+                front.state_change()
+                # once unloading, the truck holds up the classes above its own too
+                self.commit(range(front.priority + 1, PRIORITY_CLASSES), self.clock,
+                            front.state_time_minutes_map[TruckState.UNLOADING])
         
         return Truck
     
     def add_truck(self, truck, wait_time):
+        """
+        Queue an arriving truck behind every waiting truck of its priority class or higher.
+        """
+        # an unloading truck holds up every class, a waiting one its class and below
+        levels = PRIORITY_CLASSES if not self.queue else truck.priority + 1
+        position = len(self.queue)
         if self.queue:
             truck.state = TruckState.WAITING
+            # the front truck is already unloading and is never overtaken
+            while position > 1 and self.queue[position - 1].priority < truck.priority:
+                position -= 1
+
+        self.queue.insert(position, truck)
+
+        # a reservation already committed the work of the truck's class and below
+        reserved = self.reservations.pop(truck, None) is not None
+        self.commit(range(truck.priority + 1 if reserved else 0, levels), self.clock, wait_time)
 
-        self.queue.append(truck)
-        self.queue_time += wait_time
+        self.state_change()
 
-        self.state_change()
\ No newline at end of file
+    def commit(self, levels, start, work):
+        """
+        Account for work starting no earlier than start in the given priority classes.
+        """
+        for level in levels:
+            self.busy_until[level] = max(self.busy_until[level], start) + work
+
+    def reserve(self, truck, eta):
+        """
+        Reserve the station for a truck expected to arrive at minute eta.
+        """
+        self.reservations[truck] = eta
+        self.commit(range(truck.priority + 1), eta, truck.state_time_minutes_map[TruckState.UNLOADING])
+
+    def expected_wait(self, arrival, priority=0):
+        """
+        Expected wait of a truck of a priority class arriving at minute arrival.
+        """
+        return max(0, self.busy_until[priority] - arrival)
\ No newline at end of file
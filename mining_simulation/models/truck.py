@@ -37,9 +37,12 @@ class MiningTruck:
     def __init__(self, 
                  mining_hrs,
                  traveling_min=TRAVELING_TIME_MIN,
-                 unloading_time_min=HELIUM_UNLOAD_TIME_MIN):
+                 unloading_time_min=HELIUM_UNLOAD_TIME_MIN,
+                 priority=0):
         """
         Initialize a new mining truck.
+
+        Trucks of a higher priority class are unloaded first at stations.
         """
         self.state_time_minutes_map = {
             TruckState.MINING: mining_hrs * 60,
@@ -55,6 +58,9 @@ class MiningTruck:
         # track minutes spent in each state
         self.performance = {state: 0 for state in TruckState}
         self.performance["delivered"] = 0
+        self.priority = priority
+        # station reserved while traveling loaded, if any
+        self.reserved_station = None
 
         MiningTruck._next_id += 1
     
@@ -0,0 +1,299 @@
+"""
+Monitors for the mining simulation.
+
+This module defines the monitors a Simulator checks while it runs: the
+ProgressReporter for live progress and the stopping rules that end a run early.
+A monitor has a check_minutes period in simulated minutes and an update method
+that receives the simulator and returns True to stop the run. Monitors keeping
+run state reset it in their start method, so an instance can watch several
+runs in turn.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from math import ceil
+from time import perf_counter
+from mining_simulation.constants import MINING_MAX_HRS, TRAVELING_TIME_MIN, HELIUM_UNLOAD_TIME_MIN
+from mining_simulation.estimators import BatchMeans
+
+DEFAULT_CHECK_MIN = 60
+
+# longest truck cycle without queueing, delivery counts per check are periodic over it
+MAX_CYCLE_MIN = MINING_MAX_HRS * 60 + 2 * TRAVELING_TIME_MIN + HELIUM_UNLOAD_TIME_MIN
+
+
+class Progress:
+    """
+    Snapshot of a running simulation handed to progress callbacks.
+
+    Events are truck and station updates, one of each per tick.
+    """
+
+    def __init__(self, minute, simulation_minutes, elapsed_s, events, delivered):
+        """
+        Initialize a progress snapshot.
+        """
+        self.minute = minute
+        self.simulation_minutes = simulation_minutes
+        self.elapsed_s = elapsed_s
+        self.events = events
+        self.delivered = delivered
+
+    @property
+    def events_per_second(self):
+        """
+        Simulation speed in events per wall clock second.
+        """
+        return self.events / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def deliveries_per_hour(self):
+        """
+        Running fleet throughput estimate.
+        """
+        return self.delivered * 60 / self.minute if self.minute else 0.0
+
+    def __str__(self):
+        return (f"[{self.minute}/{self.simulation_minutes} min] "
+                f"{self.events_per_second:,.0f} events/s, "
+                f"{self.deliveries_per_hour:.2f} deliveries/hour")
+
+
+class ProgressReporter:
+    """
+    Reports progress to a callback at most once every min_seconds of wall clock.
+    """
+
+    def __init__(self, callback=print, min_seconds=1.0, check_minutes=DEFAULT_CHECK_MIN):
+        """
+        Initialize a progress reporter.
+        """
+        self.callback = callback
+        self.min_seconds = min_seconds
+        self.check_minutes = check_minutes
+        self.last_report = None
+
+    def start(self, simulator):
+        """
+        Report the first check of a new run.
+        """
+        self.last_report = None
+
+    def update(self, simulator):
+        """
+        Report progress when enough wall clock time has passed, never stops the run.
+        """
+        now = perf_counter()
+        if self.last_report is not None and now - self.last_report < self.min_seconds:
+            return False
+
+        self.last_report = now
+        self.callback(Progress(simulator.minute,
+                               simulator.simulation_minutes,
+                               now - simulator.wall_start,
+                               simulator.events,
+                               simulator.fleet_totals()['delivered']))
+
+        return False
+
+
+class WallClockBudget:
+    """
+    Stops the run once a wall clock budget in seconds is spent.
+    """
+
+    def __init__(self, seconds, check_minutes=DEFAULT_CHECK_MIN):
+        """
+        Initialize the budget.
+        """
+        self.seconds = seconds
+        self.check_minutes = check_minutes
+
+    def update(self, simulator):
+        """
+        Stop when the budget is spent.
+        """
+        return perf_counter() - simulator.wall_start >= self.seconds
+
+
+class DeliveryRateWindow(ABC):
+    """
+    Abstract base class for rules based on fleet deliveries per hour measured in batches.
+
+    Every check_minutes the deliveries made since the previous check are
+    turned into a rate and handed to add_rate. Checks during the simulator's
+    warm-up period are skipped.
+    """
+
+    def __init__(self, check_minutes=DEFAULT_CHECK_MIN):
+        """
+        Initialize the batch tracking.
+        """
+        self.check_minutes = check_minutes
+        self.delivered = 0
+        self.minute = 0
+
+    def start(self, simulator):
+        """
+        Measure the first batch of a new run from the start.
+        """
+        self.delivered = 0
+        self.minute = 0
+
+    def update(self, simulator):
+        """
+        Measure the delivery rate of the last batch and decide whether to stop.
+        """
+        delivered = simulator.fleet_totals()['delivered']
+        minutes = simulator.minute - self.minute
+        rate = (delivered - self.delivered) * 60 / minutes
+
+        self.delivered = delivered
+        self.minute = simulator.minute
+
+        if simulator.minute - minutes < simulator.warmup_minutes:
+            return False
+
+        return self.add_rate(rate)
+
+    @abstractmethod
+    def add_rate(self, rate):
+        """
+        Record a batch delivery rate, return True to stop.
+        """
+
+
+class ConfidenceInterval(DeliveryRateWindow):
+    """
+    Stops once the confidence interval on the delivery rate is narrower than a target.
+
+    The target is the half width of the interval in deliveries per hour,
+    estimated with batch means over batch_size checks. Rates of consecutive
+    checks are strongly correlated through the truck cycle, so by default a
+    batch spans the longest cycle.
+    """
+
+    def __init__(self, half_width, confidence=0.95, min_batches=10, batch_size=None, check_minutes=DEFAULT_CHECK_MIN):
+        """
+        Initialize the rule.
+        """
+        super().__init__(check_minutes)
+        if batch_size is None:
+            batch_size = ceil(MAX_CYCLE_MIN / check_minutes)
+        self.half_width = half_width
+        self.confidence = confidence
+        self.min_batches = min_batches
+        self.batch_size = batch_size
+        self.stats = BatchMeans(batch_size)
+
+    def start(self, simulator):
+        """
+        Forget the batches of a previous run.
+        """
+        super().start(simulator)
+        self.stats = BatchMeans(self.batch_size)
+
+    def add_rate(self, rate):
+        """
+        Stop when enough batches are in and the interval is narrow enough.
+        """
+        self.stats.push(rate)
+
+        return (self.stats.count >= self.min_batches
+                and self.stats.half_width(self.confidence) <= self.half_width)
+
+
+class SteadyState(DeliveryRateWindow):
+    """
+    Stops once the delivery rate has settled after the start-up transient.
+
+    The mean rate of the last window batches has to be within a relative
+    tolerance of the mean rate of the window batches before them.
+    """
+
+    def __init__(self, tolerance=0.05, window=5, check_minutes=DEFAULT_CHECK_MIN):
+        """
+        Initialize the rule.
+        """
+        super().__init__(check_minutes)
+        self.tolerance = tolerance
+        self.window = window
+        self.rates = deque(maxlen=2 * window)
+
+    def start(self, simulator):
+        """
+        Forget the rates of a previous run.
+        """
+        super().start(simulator)
+        self.rates.clear()
+
+    def add_rate(self, rate):
+        """
+        Stop when the two most recent windows agree.
+        """
+        self.rates.append(rate)
+        if len(self.rates) < self.rates.maxlen:
+            return False
+
+        rates = list(self.rates)
+        previous = sum(rates[:self.window]) / self.window
+        recent = sum(rates[self.window:]) / self.window
+
+        return previous > 0 and abs(recent - previous) <= self.tolerance * previous
+
+
+class SteadyStateStatistics:
+    """
+    Steady-state estimates with error bars for every fleet KPI, per hour.
+
+    Every check_minutes after warm-up the change of each fleet total is
+    turned into a rate per hour and fed to a BatchMeans estimator, so one
+    long run gives estimates with confidence intervals in constant memory.
+    Never stops the run.
+    """
+
+    def __init__(self, batch_size=10, check_minutes=DEFAULT_CHECK_MIN):
+        """
+        Initialize the estimators, batches hold batch_size checks.
+        """
+        self.batch_size = batch_size
+        self.check_minutes = check_minutes
+        self.estimators = {}
+        self.totals = None
+        self.minute = 0
+
+    def start(self, simulator):
+        """
+        Forget the estimates of a previous run.
+        """
+        self.estimators = {}
+        self.totals = None
+        self.minute = 0
+
+    def update(self, simulator):
+        """
+        Feed the rates since the previous check to the estimators.
+        """
+        totals = simulator.fleet_totals()
+        # every total is zero at the start of the run
+        previous = self.totals if self.totals is not None else dict.fromkeys(totals, 0)
+        minutes = simulator.minute - self.minute
+        self.totals = totals
+        self.minute = simulator.minute
+
+        if simulator.minute - minutes < simulator.warmup_minutes:
+            return False
+
+        for kpi, total in totals.items():
+            if kpi not in self.estimators:
+                self.estimators[kpi] = BatchMeans(self.batch_size)
+            self.estimators[kpi].push((total - previous[kpi]) * 60 / minutes)
+
+        return False
+
+    def summary(self, confidence=0.95):
+        """
+        Mean and confidence interval half width per KPI.
+        """
+        return {kpi: (estimator.mean, estimator.half_width(confidence))
+                for kpi, estimator in self.estimators.items()}
@@ -0,0 +1,190 @@
+"""
+Fleet sizing optimizer for the mining simulation.
+
+This module searches for the cheapest number of trucks and stations that
+delivers a target number of loads per day with an average wait per delivery
+under a limit. The search uses successive halving: every configuration is
+first simulated on a short horizon, only the most promising fraction is
+promoted to a horizon eta times longer, and so on until the full horizon.
+"""
+
+from math import ceil
+from multiprocessing import Pool
+from mining_simulation.batch import run_scenario
+from mining_simulation.monitoring import MAX_CYCLE_MIN
+from mining_simulation.scenario import Scenario
+
+MINUTES_PER_DAY = 24 * 60
+
+# default warm-up, one longest truck cycle so the synchronized start has spread out
+WARMUP_HRS = ceil(MAX_CYCLE_MIN / 60)
+
+
+class Candidate:
+    """
+    A fleet configuration and its metrics at the latest horizon it was simulated on.
+    """
+
+    def __init__(self, trucks, stations, cost):
+        """
+        Initialize an unevaluated candidate.
+        """
+        self.trucks = trucks
+        self.stations = stations
+        self.cost = cost
+        self.hours = 0
+        self.rows = []
+        self.loads_per_day = 0.0
+        self.avg_wait = 0.0
+
+    def evaluate(self, hours, rows):
+        """
+        Aggregate the output rows of every replication at a horizon, adding
+        to the replications already run at that horizon.
+        """
+        if hours != self.hours:
+            self.rows = []
+        self.rows.extend(rows)
+        rows = self.rows
+
+        minutes = sum(row['minutes'] for row in rows)
+        delivered = sum(row['delivered'] for row in rows)
+        waiting = sum(row['waiting'] for row in rows)
+
+        self.hours = hours
+        self.loads_per_day = delivered * MINUTES_PER_DAY / minutes
+        self.avg_wait = waiting / delivered if delivered else float('inf')
+
+    def shortfall(self, target_loads, max_wait):
+        """
+        Relative distance to meeting the target, 0 when it is met.
+        """
+        loads = max(0.0, 1 - self.loads_per_day / target_loads)
+        wait = max(0.0, self.avg_wait / max_wait - 1) if max_wait else float(self.avg_wait > 0)
+
+        return loads + wait
+
+    def __repr__(self):
+        return (f"Candidate(trucks={self.trucks}, stations={self.stations}, cost={self.cost}, "
+                f"loads_per_day={self.loads_per_day:.1f}, avg_wait={self.avg_wait:.2f}, hours={self.hours})")
+
+
+class FleetOptimizer:
+    """
+    Successive halving search over truck and station counts.
+
+    Candidates within slack of the target are ranked by cost ahead of every
+    other candidate, which is ranked by its shortfall. Every rung keeps the
+    best 1/eta of the candidates and multiplies the horizon by eta. All
+    candidates of a rung share the replication seeds (common random numbers)
+    and are evaluated in parallel.
+
+    Before a cut, the candidates ranked within cut_band of it (as a fraction
+    of the candidates kept) get replications more replications, so noise on
+    the short horizons does not decide close calls. Without a warm-up every
+    rung leaves out its first half, up to one longest truck cycle.
+    """
+
+    def __init__(self, target_loads, max_wait, max_trucks, max_stations,
+                 truck_cost=1, station_cost=1, min_hours=24, max_hours=24 * 27,
+                 eta=3, replications=2, slack=0.1, warmup_hours=None, seed=0,
+                 priority_trucks=0, reservations=False, cut_band=0.5):
+        """
+        Initialize the optimizer, every candidate has up to priority_trucks
+        high priority trucks and uses reservations when set.
+        """
+        min_hours = min(min_hours, max_hours)
+        if warmup_hours is not None and warmup_hours >= min_hours:
+            raise ValueError(f"warmup_hours ({warmup_hours}) must be shorter than min_hours ({min_hours})")
+
+        self.target_loads = target_loads
+        self.max_wait = max_wait
+        self.candidates = [Candidate(trucks, stations, trucks * truck_cost + stations * station_cost)
+                           for trucks in range(1, max_trucks + 1)
+                           for stations in range(1, max_stations + 1)]
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        self.eta = eta
+        self.replications = replications
+        self.slack = slack
+        self.warmup_hours = warmup_hours
+        self.seed = seed
+        self.priority_trucks = priority_trucks
+        self.reservations = reservations
+        self.cut_band = cut_band
+        self.simulations = 0
+
+    def rank_key(self, candidate):
+        """
+        Sort key ranking promising candidates by cost and the rest by shortfall.
+        """
+        shortfall = candidate.shortfall(self.target_loads, self.max_wait)
+        if shortfall <= self.slack:
+            return (0, candidate.cost, shortfall)
+
+        return (1, shortfall, candidate.cost)
+
+    def rung_warmup(self, hours):
+        """
+        Warm-up hours of a rung.
+        """
+        if self.warmup_hours is not None:
+            return self.warmup_hours
+
+        return min(WARMUP_HRS, hours // 2)
+
+    def evaluate(self, pool, candidates, hours, replications):
+        """
+        Simulate the given replications of every candidate at a horizon.
+        """
+        by_id = {f"{candidate.trucks}x{candidate.stations}": candidate for candidate in candidates}
+        scenarios = [Scenario(id=scenario_id,
+                              trucks=candidate.trucks,
+                              stations=candidate.stations,
+                              hours=hours,
+                              warmup_hours=self.rung_warmup(hours),
+                              seed=self.seed + replication,
+                              priority_trucks=min(self.priority_trucks, candidate.trucks),
+                              reservations=self.reservations)
+                     for scenario_id, candidate in by_id.items()
+                     for replication in replications]
+
+        rows = {scenario_id: [] for scenario_id in by_id}
+        for row in pool.imap_unordered(run_scenario, scenarios):
+            rows[row['id']].append(row)
+
+        for scenario_id, candidate in by_id.items():
+            candidate.evaluate(hours, rows[scenario_id])
+
+        self.simulations += len(scenarios)
+
+    def run(self, workers=None):
+        """
+        Run the search and return the cheapest candidate meeting the target at
+        the full horizon, or None when no candidate does.
+        """
+        candidates = self.candidates
+        hours = self.min_hours
+
+        with Pool(workers) as pool:
+            while True:
+                self.evaluate(pool, candidates, hours, range(self.replications))
+                candidates = sorted(candidates, key=self.rank_key)
+
+                if hours >= self.max_hours:
+                    break
+
+                keep = max(1, ceil(len(candidates) / self.eta))
+                band = ceil(keep * self.cut_band)
+                close = candidates[max(0, keep - band):keep + band]
+                if len(close) > 1 and len(candidates) > keep:
+                    self.evaluate(pool, close, hours, range(self.replications, 2 * self.replications))
+                    candidates = sorted(candidates, key=self.rank_key)
+
+                candidates = candidates[:keep]
+                hours = min(self.max_hours, hours * self.eta)
+
+        feasible = [candidate for candidate in candidates
+                    if candidate.shortfall(self.target_loads, self.max_wait) == 0]
+
+        return min(feasible, key=lambda candidate: candidate.cost, default=None)
@@ -0,0 +1,176 @@
+"""
+Results views for the mining simulation.
+
+This module defines the SimulationResults class and the lazy MetricView and
+MetricRow views it exposes. Views read straight from the performance counters
+of trucks and stations, nothing is copied until a caller asks for it. Given a
+baseline snapshot, views report the counters relative to it, which is how the
+warm-up period is left out.
+"""
+
+import heapq
+from mining_simulation.models.truck import TruckState
+from mining_simulation.models.station import UnloadStationState
+
+
+class MetricRow:
+    """
+    Lazy view of the metrics of a single truck or station.
+    """
+
+    def __init__(self, entity, keys, baseline=None):
+        """
+        Initialize a row over an entity and the column to counter key mapping.
+        """
+        self.entity = entity
+        self.keys = keys
+        self.baseline = baseline
+
+    def __getitem__(self, column):
+        """
+        Read a single metric from the entity.
+        """
+        if column == 'id':
+            return self.entity.id
+
+        key = self.keys[column]
+        if self.baseline is None:
+            return self.entity.performance[key]
+
+        return self.entity.performance[key] - self.baseline[self.entity][key]
+
+    def __repr__(self):
+        return f"MetricRow({self.to_dict()})"
+
+    def to_dict(self):
+        """
+        Materialize the row as a dictionary.
+        """
+        return {column: self[column] for column in self.keys}
+
+
+class MetricView:
+    """
+    Lazy view over the metrics of a group of trucks or stations.
+
+    Supports column access, filtering and top-k selection by any KPI. Filters
+    are only applied when the view is iterated.
+    """
+
+    def __init__(self, entities, keys, baseline=None, predicates=()):
+        """
+        Initialize a view over entities and the column to counter key mapping.
+        """
+        self.entities = entities
+        self.keys = keys
+        self.baseline = baseline
+        self.predicates = predicates
+
+    @classmethod
+    def for_states(cls, entities, state_enum, counters, baseline=None):
+        """
+        Build a view whose columns are id, each state of the enum and the extra counters.
+        """
+        keys = {'id': 'id'}
+        keys.update({state.name.lower(): state for state in state_enum})
+        keys.update({counter: counter for counter in counters})
+
+        return cls(entities, keys, baseline)
+
+    @property
+    def columns(self):
+        """
+        Names of the available columns.
+        """
+        return list(self.keys)
+
+    def __iter__(self):
+        """
+        Iterate over the rows matching every filter.
+        """
+        for entity in self.entities:
+            row = MetricRow(entity, self.keys, self.baseline)
+            if all(predicate(row) for predicate in self.predicates):
+                yield row
+
+    def __len__(self):
+        if not self.predicates:
+            return len(self.entities)
+
+        return sum(1 for _ in self)
+
+    def __getitem__(self, column):
+        """
+        Return the values of a single column.
+        """
+        if column not in self.keys:
+            raise KeyError(column)
+
+        return [row[column] for row in self]
+
+    def filter(self, predicate):
+        """
+        Return a new view keeping only the rows where predicate(row) is true.
+        """
+        return MetricView(self.entities, self.keys, self.baseline, self.predicates + (predicate,))
+
+    def sum(self, kpi):
+        """
+        Total of a KPI over the rows.
+        """
+        return sum(row[kpi] for row in self)
+
+    def top(self, k, kpi, largest=True):
+        """
+        Select the k rows with the largest (or smallest) value of a KPI.
+
+        Uses a bounded heap, so only k rows are kept while scanning.
+        """
+        select = heapq.nlargest if largest else heapq.nsmallest
+
+        return select(k, self, key=lambda row: row[kpi])
+
+    def sorted(self, kpi, reverse=False):
+        """
+        Return every row ordered by a KPI.
+        """
+        return sorted(self, key=lambda row: row[kpi], reverse=reverse)
+
+    def to_dicts(self):
+        """
+        Materialize the view as a list of dictionaries.
+        """
+        return [row.to_dict() for row in self]
+
+
+class SimulationResults:
+    """
+    Results of a simulation, exposed as lazy views over trucks and stations.
+    """
+
+    def __init__(self, trucks, stations, baseline=None):
+        """
+        Initialize the results over the final trucks and stations.
+        """
+        self.trucks = MetricView.for_states(trucks, TruckState, ['delivered'], baseline)
+        self.stations = MetricView.for_states(stations, UnloadStationState, ['unloaded'], baseline)
+
+    def totals(self):
+        """
+        Totals of every truck and station KPI.
+        """
+        totals = {}
+        for view in (self.trucks, self.stations):
+            for kpi in view.columns[1:]:
+                totals[kpi] = view.sum(kpi)
+
+        return totals
+
+    def to_dict(self):
+        """
+        Materialize every metric in the performance data format.
+        """
+        return {
+            'trucks': self.trucks.to_dicts(),
+            'stations': self.stations.to_dicts()
+        }
@@ -0,0 +1,88 @@
+"""
+Scenario description for the mining simulation.
+
+This module defines the Scenario class, a small picklable description of a
+simulation run that can be read from manifest files and shipped to workers.
+"""
+
+from mining_simulation.constants import SIMULATION_TIME_HRS
+
+
+class Scenario:
+    """
+    Parameters of a single simulation run.
+    """
+
+    def __init__(self, id, trucks, stations, hours=SIMULATION_TIME_HRS, warmup_hours=0, seed=None,
+                 priority_trucks=0, reservations=False):
+        """
+        Initialize a scenario.
+        """
+        self.id = id
+        self.trucks = trucks
+        self.stations = stations
+        self.hours = hours
+        self.warmup_hours = warmup_hours
+        self.seed = seed
+        self.priority_trucks = priority_trucks
+        self.reservations = reservations
+
+    @classmethod
+    def from_dict(cls, row):
+        """
+        Build a scenario from a manifest row, values may be strings as read from CSV.
+        """
+        if row.get('id') in (None, ''):
+            raise ValueError(f"Scenario without an id: {row}")
+
+        seed = row.get('seed')
+        reservations = row.get('reservations') or False
+        if isinstance(reservations, str):
+            reservations = reservations.strip().lower() in ('1', 'true', 'yes')
+
+        scenario = cls(id=str(row['id']),
+                   trucks=int(row['trucks']),
+                       stations=int(row['stations']),
+                       hours=int(row.get('hours') or SIMULATION_TIME_HRS),
+                       warmup_hours=int(row.get('warmup_hours') or 0),
+                       seed=None if seed in (None, '') else int(seed),
+                       priority_trucks=int(row.get('priority_trucks') or 0),
+                       reservations=bool(reservations))
+        scenario.validate()
+
+        return scenario
+
+    def validate(self):
+        """
+        Raise ValueError when the scenario cannot be simulated.
+        """
+        if self.trucks < 1 or self.stations < 1 or self.hours < 1:
+            raise ValueError(f"Scenario {self.id}: trucks, stations and hours must be positive")
+        if not 0 <= self.warmup_hours < self.hours:
+            raise ValueError(f"Scenario {self.id}: warmup_hours ({self.warmup_hours}) must be shorter than hours ({self.hours})")
+        if not 0 <= self.priority_trucks <= self.trucks:
+            raise ValueError(f"Scenario {self.id}: priority_trucks ({self.priority_trucks}) must be between 0 and trucks ({self.trucks})")
+
+    def to_dict(self):
+        """
+        Describe the scenario as a manifest row.
+        """
+        return {
+            'id': self.id,
+            'trucks': self.trucks,
+            'stations': self.stations,
+            'hours': self.hours,
+            'warmup_hours': self.warmup_hours,
+            'seed': self.seed,
+            'priority_trucks': self.priority_trucks,
+            'reservations': self.reservations
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, Scenario) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Scenario({self.to_dict()})"
@@ -5,11 +5,14 @@ This module defines the Simulator class that orchestrates the interaction
 between trucks, stations, and locations in the simulation.
 """
 
-from random import randint
+from operator import attrgetter
+from random import randint, Random
+from time import perf_counter
 from mining_simulation.constants import MINING_MINIMUM_HRS, MINING_MAX_HRS, SIMULATION_TIME_HRS, PASS_TIME_MIN
 from mining_simulation.models.truck import MiningTruck, TruckState
-from mining_simulation.models.station import UnloadStation, UnloadStationState
+from mining_simulation.models.station import UnloadStation
 from mining_simulation.models.location import Location, UnloadingStations
+from mining_simulation.results import SimulationResults
 
 
 class Simulator:
@@ -20,45 +23,194 @@ class Simulator:
     simulation over time and collecting performance metrics.
     """
     
-    def __init__(self, trucks_amt, unload_stations_amt, simulation_hrs=SIMULATION_TIME_HRS):
+    def __init__(self, trucks_amt, unload_stations_amt, simulation_hrs=SIMULATION_TIME_HRS, warmup_hrs=0, seed=None,
+                 priority_trucks=0, reservations=False):
         """
         Initialize a new simulation environment.
+
+        Metrics gathered during the first warmup_hrs are left out of the results.
+        With a seed, mining times come from a private random generator so the
+        run is reproducible, otherwise the global one is used. The first
+        priority_trucks trucks are in the high priority class at stations and
+        with reservations, loaded trucks reserve a station as they leave the
+        mining site.
         """
+        if warmup_hrs and warmup_hrs >= simulation_hrs:
+            raise ValueError(f"warmup_hrs ({warmup_hrs}) must be shorter than simulation_hrs ({simulation_hrs})")
+
+        mining_hrs = Random(seed).randint if seed is not None else randint
         self.simulation_minutes = simulation_hrs * 60
-        self.trucks = {MiningTruck(randint(MINING_MINIMUM_HRS, MINING_MAX_HRS)) for _ in range(trucks_amt)}
+        self.warmup_minutes = warmup_hrs * 60
+        self.reservations = reservations
+        self.trucks = {MiningTruck(mining_hrs(MINING_MINIMUM_HRS, MINING_MAX_HRS), priority=int(i < priority_trucks))
+                       for i in range(trucks_amt)}
         self.stations = [UnloadStation() for _ in range(unload_stations_amt)]
         self.locations = {
             TruckState.MINING: Location(TruckState.MINING),
             TruckState.TRAVELING: Location(TruckState.TRAVELING),
             TruckState.UNLOADING: UnloadingStations(TruckState.UNLOADING, self.stations)
         }
-        self.performance_data = {
-            'trucks': [],
-            'stations': []
-        }
+        self.fleet = []
+        self.minute = 0
+        self.ticks = 0
+        self.wall_start = None
+        self.stopped_by = None
+        self.baseline = None
+        self.results = None
+        self._kernel = None
+        self._performance_data = None
     
-    def start(self, interval=PASS_TIME_MIN):
+    @classmethod
+    def from_scenario(cls, scenario):
+        """
+        Create a simulator from a Scenario description.
+        """
+        return cls(trucks_amt=scenario.trucks,
+                   unload_stations_amt=scenario.stations,
+                   simulation_hrs=scenario.hours,
+                   warmup_hrs=scenario.warmup_hours,
+                   seed=scenario.seed,
+                   priority_trucks=scenario.priority_trucks,
+                   reservations=scenario.reservations)
+
+    def start(self, interval=PASS_TIME_MIN, kernel=False, monitors=()):
         """
         Start and run the simulation.
         
         Advances time in intervals and manages the movement of trucks
         between locations until the simulation time is exhausted.
+        With kernel set, the ticks run on the integer-encoded TruckKernel
+        instead, which gives identical results.
+
+        Monitors are updated every check_minutes of simulated time and
+        end the run early when their update returns True, monitors with
+        start and finish methods are told before the first tick and when
+        the run is over. At the end of the
+        warm-up period the counters are snapshotted as the results baseline,
+        a run stopped before then raises RuntimeError as it has no results.
         """
+        for monitor in monitors:
+            if monitor.check_minutes <= 0:
+                raise ValueError(f"{type(monitor).__name__}.check_minutes must be positive, got {monitor.check_minutes}")
+
         # Initialize all trucks to mining location
         self.locations[TruckState.MINING].current = self.trucks
-        locations = self.locations.values()
-        start = 0
-        while start < self.simulation_minutes:
+        self.fleet = list(self.trucks)
+        self.minute = 0
+        self.ticks = 0
+        self.wall_start = perf_counter()
+        self.stopped_by = None
+        self.baseline = None
+        self._kernel = None
+
+        if kernel:
+            if self.reservations or any(truck.priority for truck in self.fleet):
+                raise ValueError("The kernel only supports first come first served stations without reservations")
+
+            # imported here so the compiler is only loaded when asked for
+            from mining_simulation.kernel import TruckKernel
+
+            self._kernel = TruckKernel(self.locations)
+
+        for monitor in monitors:
+            if hasattr(monitor, 'start'):
+                monitor.start(self)
+
+        warming_up = self.warmup_minutes > 0
+        next_checks = {monitor: monitor.check_minutes for monitor in monitors}
+        while self.minute < self.simulation_minutes and self.stopped_by is None:
+            until = min([self.simulation_minutes, *next_checks.values()])
+            if warming_up:
+                until = min(until, self.warmup_minutes)
+            self._advance(until, interval)
+
+            if warming_up and self.minute >= self.warmup_minutes:
+                warming_up = False
+                self._truncate_warmup()
+
+            for monitor, next_check in next_checks.items():
+                if self.minute < next_check:
+                    continue
+
+                next_checks[monitor] = self.minute + monitor.check_minutes
+                if monitor.update(self) and self.stopped_by is None:
+                    self.stopped_by = monitor
+
+        if self._kernel is not None:
+            self._kernel.unpack()
+            self._kernel = None
+
+        for monitor in monitors:
+            if hasattr(monitor, 'finish'):
+                monitor.finish(self)
+
+        if warming_up:
+            raise RuntimeError(f"{type(self.stopped_by).__name__} stopped the run at minute {self.minute}, "
+                               f"inside the {self.warmup_minutes} minute warm-up")
+
+    def _advance(self, until, interval):
+        """
+        Run ticks of the given interval until the simulated minute reaches until.
+        """
+        ticks = -(-(until - self.minute) // interval)
 
-            # advance time for all trucks in each location
-            for location in locations:
-                location.pass_time(interval)
+        if self._kernel is not None:
+            self._kernel.advance(ticks, interval)
+        else:
+            locations = self.locations.values()
+            mining = self.locations[TruckState.MINING]
+            unloading = self.locations[TruckState.UNLOADING]
+            for tick in range(1, ticks + 1):
 
-            # update leaving trucks to move to their next location
-            for location in locations:
-                location.resolve_departures(self.locations)
-            
-            start += interval
+                # advance time for all trucks in each location
+                for location in locations:
+                    location.pass_time(interval)
+
+                # loaded trucks leaving the mining site reserve a station for their arrival
+                if self.reservations:
+                    now = self.minute + tick * interval
+                    for truck in sorted(mining.leaving, key=attrgetter('id')):
+                        unloading.reserve(truck, now + truck.time_left)
+
+                # update leaving trucks to move to their next location
+                for location in locations:
+                    location.resolve_departures(self.locations)
+
+        self.ticks += ticks
+        self.minute += ticks * interval
+
+    def _truncate_warmup(self):
+        """
+        Snapshot every counter so results only cover the time after warm-up.
+        """
+        if self._kernel is not None:
+            self._kernel.unpack()
+
+        self.baseline = {entity: dict(entity.performance) for entity in (*self.fleet, *self.stations)}
+
+    @property
+    def uses_kernel(self):
+        """
+        Whether the run is currently advanced by the TruckKernel.
+        """
+        return self._kernel is not None
+
+    @property
+    def events(self):
+        """
+        Truck and station updates processed so far.
+        """
+        return self.ticks * (len(self.fleet) + len(self.stations))
+
+    def fleet_totals(self):
+        """
+        Fleet wide totals of every truck and station KPI at the current minute,
+        warm-up included.
+        """
+        if self._kernel is not None:
+            return self._kernel.totals()
+
+        return SimulationResults(self.fleet, self.stations).totals()
 
     def end(self):
         """
@@ -74,34 +226,32 @@ class Simulator:
 
         for station in self.stations:
             self.trucks.extend(station.queue)
+
+        self.results = SimulationResults(self.trucks, self.stations, self.baseline)
     
     def gather_performance_metrics(self):
         """
         Collect performance metrics from all trucks and stations.
         
-        Organizes the data into a structured format for analysis.
+        Materializes the lazy results views into a structured format for analysis,
+        before the simulation has ended there are no metrics yet.
         """
-        for truck in self.trucks:
-            truck_data = {'id': truck.id}
-            for kpi, value in truck.performance.items():
-                if isinstance(kpi, TruckState):
-                    kpi = kpi.name.lower()
-
-                truck_data[kpi] = value
+        if self.results is None:
+            return {'trucks': [], 'stations': []}
 
-            self.performance_data['trucks'].append(truck_data)
+        self._performance_data = self.results.to_dict()
 
-        for station in self.stations:
-            station_data = {'id': station.id}
-            for kpi, value in station.performance.items():
-                if isinstance(kpi, UnloadStationState):
-                    kpi = kpi.name.lower()
-                
-                station_data[kpi] = value
+        return self._performance_data
 
-            self.performance_data['stations'].append(station_data)
+    @property
+    def performance_data(self):
+        """
+        Performance metrics as dictionaries, only built on first access.
+        """
+        if self._performance_data is None:
+            return self.gather_performance_metrics()
 
-        return self.performance_data
+        return self._performance_data
 
     def __enter__(self):
         """
@@ -113,9 +263,9 @@ class Simulator:
         """
         Context manager exit method.
         
-        Cleans up and gathers metrics when the with block is exited.
+        Cleans up when the with block is exited, metrics are exposed
+        through the lazy results views.
         """
         self.end()
-        self.gather_performance_metrics()
 
         return False
\ No newline at end of file
@@ -0,0 +1,125 @@
+import csv
+import json
+
+import pytest
+from mining_simulation.batch import read_manifest, run_batch, run_scenario, COLUMNS
+from mining_simulation.scenario import Scenario
+
+SCENARIOS = [Scenario(id=f"s{i}", trucks=2 + i, stations=1 + i % 2, hours=6, seed=i) for i in range(6)]
+SCENARIOS.append(Scenario(id='p', trucks=8, stations=2, hours=6, seed=1, priority_trucks=3, reservations=True))
+
+
+def write_manifest(path, scenarios):
+    """
+    Write scenarios as a JSONL or CSV manifest.
+    """
+    rows = [scenario.to_dict() for scenario in scenarios]
+    with open(path, 'w', newline='') as manifest:
+        if str(path).endswith('.csv'):
+            writer = csv.DictWriter(manifest, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            manifest.writelines(json.dumps(row) + '\n' for row in rows)
+
+
+class TestBatch:
+
+    @pytest.mark.parametrize("suffix", ['.jsonl', '.csv'])
+    def test_read_manifest(self, tmp_path, suffix):
+        """
+        Tests that JSONL and CSV manifests give the same scenarios
+        """
+        path = tmp_path / f"manifest{suffix}"
+        write_manifest(path, SCENARIOS)
+
+        assert list(read_manifest(str(path))) == SCENARIOS
+
+    @pytest.mark.parametrize("row, message", [
+        ({'id': 'x', 'trucks': 2, 'stations': 1, 'hours': 4, 'warmup_hours': 4}, 'warmup_hours'),
+        ({'id': 'x', 'trucks': 0, 'stations': 1}, 'positive'),
+        ({'id': 'x', 'trucks': 2, 'stations': 1, 'priority_trucks': 3}, 'priority_trucks'),
+        ({'id': 'x', 'stations': 1}, "missing 'trucks'"),
+    ])
+    def test_invalid_row_fails_up_front(self, tmp_path, row, message):
+        """
+        Tests that an invalid manifest row fails the batch before anything runs, naming the row
+        """
+        manifest = tmp_path / "manifest.jsonl"
+        output = tmp_path / "results.csv"
+        write_manifest(manifest, SCENARIOS[:2])
+        with open(manifest, 'a') as rows:
+            rows.write(json.dumps(row) + '\n')
+
+        with pytest.raises(ValueError, match=f"row 3: .*{message}"):
+            run_batch(str(manifest), str(output), workers=1)
+
+        assert not output.exists()
+
+    def test_kernel_incompatible_row(self, tmp_path):
+        """
+        Tests that kernel batches refuse priority and reservation scenarios before running
+        """
+        manifest = tmp_path / "manifest.jsonl"
+        write_manifest(manifest, SCENARIOS)
+
+        with pytest.raises(ValueError, match=SCENARIOS[-1].id):
+            run_batch(str(manifest), str(tmp_path / "results.csv"), workers=1, kernel=True)
+
+    def test_seeded_scenario(self):
+        """
+        Tests that seeded scenarios are reproducible
+        """
+        assert run_scenario(SCENARIOS[3]) == run_scenario(SCENARIOS[3])
+        assert run_scenario(SCENARIOS[3], kernel=True) == run_scenario(SCENARIOS[3])
+
+    def test_run_batch_resumes(self, tmp_path):
+        """
+        Tests that a batch writes a row per scenario and skips completed ids when rerun
+        """
+        manifest = tmp_path / "manifest.jsonl"
+        output = tmp_path / "results.csv"
+        write_manifest(manifest, SCENARIOS[:4])
+
+        assert run_batch(str(manifest), str(output), workers=2, chunksize=1) == (4, 0)
+
+        write_manifest(manifest, SCENARIOS)
+        assert run_batch(str(manifest), str(output), workers=2, chunksize=2) == (3, 4)
+
+        with open(output, newline='') as results:
+            rows = list(csv.DictReader(results))
+
+        assert list(rows[0]) == COLUMNS
+        assert sorted(row['id'] for row in rows) == sorted(scenario.id for scenario in SCENARIOS)
+
+        for scenario in (SCENARIOS[5], SCENARIOS[-1]):
+            expected = run_scenario(scenario)
+            row = next(row for row in rows if row['id'] == scenario.id)
+            assert row == {column: str(expected[column]) for column in COLUMNS}
+
+        # priority and reservation settings survive the CSV round trip
+        assert Scenario.from_dict(row) == SCENARIOS[-1]
+
+    def test_run_batch_parquet(self, tmp_path):
+        """
+        Tests that parquet output is written a part per window with one schema and resumes
+        """
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.parquet
+
+        # unseeded scenarios give an all-None seed column
+        unseeded = [Scenario(id=f"u{i}", trucks=2, stations=1, hours=2) for i in range(2)]
+        manifest = tmp_path / "manifest.jsonl"
+        output = tmp_path / "results.parquet"
+        write_manifest(manifest, unseeded)
+
+        assert run_batch(str(manifest), str(output), workers=1, chunksize=1) == (2, 0)
+
+        write_manifest(manifest, unseeded + SCENARIOS)
+        assert run_batch(str(manifest), str(output), workers=1, chunksize=1) == (7, 2)
+
+        parts = sorted(output.iterdir())
+        assert len(parts) == 3
+        table = pyarrow.concat_tables(pyarrow.parquet.read_table(part) for part in parts)
+        assert table.column_names == COLUMNS
+        assert sorted(table.column('id').to_pylist()) == sorted(scenario.id for scenario in unseeded + SCENARIOS)
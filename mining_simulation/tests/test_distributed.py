@@ -0,0 +1,244 @@
+import socket
+import threading
+from time import sleep
+
+import pytest
+
+from mining_simulation.batch import run_scenario
+from mining_simulation.distributed import (Coordinator, LocalCluster, read_frames, recv_message, replicate,
+                                           run_worker, send_message, FRAME, HEARTBEATS_PER_LEASE, LEASE_S,
+                                           MAX_ATTEMPTS, MAX_FRAME_BYTES)
+from mining_simulation.scenario import Scenario
+
+SCENARIOS = [Scenario(id=f"s{i}", trucks=2 + i, stations=1 + i % 2, hours=6, seed=i) for i in range(6)]
+
+# takes about a second to run
+LONG_SCENARIO = Scenario(id='long', trucks=20, stations=2, hours=24 * 20, seed=1)
+
+
+def flaky_worker(address):
+    """
+    Take a chunk from the coordinator and disconnect without running it.
+    """
+    with socket.create_connection(address) as sock:
+        send_message(sock, ['request'])
+        return recv_message(sock)
+
+
+def chunk_message(chunk_id, scenarios, lease_s=LEASE_S):
+    """
+    Chunk message as a worker receives it.
+    """
+    return ['chunk', chunk_id, [scenario.to_dict() for scenario in scenarios], lease_s / HEARTBEATS_PER_LEASE]
+
+
+class TestDistributed:
+
+    def test_message_round_trip(self):
+        """
+        Tests that messages survive the length-prefixed framing, whole or in pieces
+        """
+        left, right = socket.socketpair()
+        with left, right:
+            send_message(left, chunk_message(3, SCENARIOS))
+            assert recv_message(right) == chunk_message(3, SCENARIOS)
+
+            left.close()
+            assert recv_message(right) is None
+
+        payload = b'["request"]'
+        buffer = bytearray(FRAME.pack(len(payload)) + payload + FRAME.pack(len(payload)))
+        assert read_frames(buffer) == [['request']]
+        assert len(buffer) == FRAME.size
+        buffer.extend(payload)
+        assert read_frames(buffer) == [['request']]
+        assert not buffer
+
+        with pytest.raises(ValueError):
+            read_frames(bytearray(FRAME.pack(MAX_FRAME_BYTES + 1)))
+
+    def test_replicate(self):
+        """
+        Tests that replications get their own ids and consecutive seeds
+        """
+        replications = list(replicate([SCENARIOS[2], Scenario(id='u', trucks=1, stations=1)], 3))
+
+        assert [scenario.id for scenario in replications] == ['s2/0', 's2/1', 's2/2', 'u/0', 'u/1', 'u/2']
+        assert [scenario.seed for scenario in replications] == [2, 3, 4, 0, 1, 2]
+        assert all(scenario.trucks == SCENARIOS[2].trucks for scenario in replications[:3])
+
+        prioritized = Scenario(id='p', trucks=4, stations=1, priority_trucks=2, reservations=True)
+        assert all(scenario.priority_trucks == 2 and scenario.reservations for scenario in replicate([prioritized], 2))
+
+    def test_local_cluster(self):
+        """
+        Tests that a local cluster returns the same rows as running every scenario in process
+        """
+        rows = list(LocalCluster(workers=2).run(SCENARIOS, chunk_size=2))
+
+        assert sorted(rows, key=lambda row: row['id']) == [run_scenario(scenario) for scenario in SCENARIOS]
+
+    def test_lost_chunk_is_retried(self):
+        """
+        Tests that the chunk of a worker that disconnects is handed out again
+        """
+        coordinator = Coordinator(SCENARIOS, chunk_size=3)
+        lost = []
+
+        def workers():
+            lost.append(flaky_worker(coordinator.address))
+            run_worker(*coordinator.address)
+
+        thread = threading.Thread(target=workers)
+        thread.start()
+        rows = list(coordinator.results(idle_timeout=30))
+        thread.join()
+
+        assert lost == [chunk_message(0, SCENARIOS[:3])]
+        assert coordinator.retried == 1
+        assert sorted(rows, key=lambda row: row['id']) == [run_scenario(scenario) for scenario in SCENARIOS]
+
+    def test_work_stealing(self):
+        """
+        Tests that an idle worker steals a slow worker's chunk and the first result wins
+        """
+        coordinator = Coordinator(SCENARIOS, chunk_size=len(SCENARIOS))
+        messages = []
+
+        def workers():
+            with socket.create_connection(coordinator.address) as slow, \
+                    socket.create_connection(coordinator.address) as fast:
+                send_message(slow, ['request'])
+                messages.append(recv_message(slow))
+                send_message(fast, ['request'])
+                _, chunk_id, scenarios, _ = recv_message(fast)
+                for scenario in scenarios:
+                    send_message(fast, ['row', chunk_id, run_scenario(Scenario.from_dict(scenario))])
+                send_message(fast, ['done', chunk_id])
+                messages.append(recv_message(slow))
+
+        thread = threading.Thread(target=workers)
+        thread.start()
+        rows = list(coordinator.results(idle_timeout=30))
+        thread.join()
+
+        assert messages == [chunk_message(0, SCENARIOS), ['stop']]
+        assert coordinator.stolen == 1
+        assert [row['id'] for row in rows] == [scenario.id for scenario in SCENARIOS]
+
+    def test_stalled_peer_and_expired_lease(self):
+        """
+        Tests that a peer stalled mid-frame does not block the run and that a
+        chunk held over a silent connection is handed out again once its lease expires
+        """
+        coordinator = Coordinator(SCENARIOS, chunk_size=3, lease_s=0.2)
+        peers = []
+
+        def workers():
+            stalled = socket.create_connection(coordinator.address)
+            stalled.sendall(FRAME.pack(100)[:2])
+            silent = socket.create_connection(coordinator.address)
+            send_message(silent, ['request'])
+            peers.extend([stalled, silent, recv_message(silent)])
+            # start once the lease has run out, a worker arriving earlier would steal the chunk instead
+            sleep(0.5)
+            run_worker(*coordinator.address)
+
+        thread = threading.Thread(target=workers)
+        thread.start()
+        rows = list(coordinator.results(idle_timeout=30))
+        thread.join()
+        for peer in peers[:2]:
+            peer.close()
+
+        assert peers[2] == chunk_message(0, SCENARIOS[:3], lease_s=0.2)
+        assert coordinator.retried == 1
+        assert sorted(row['id'] for row in rows) == [scenario.id for scenario in SCENARIOS]
+
+    def test_malformed_result(self):
+        """
+        Tests that a peer sending results that do not match its chunk is dropped and the chunk retried
+        """
+        coordinator = Coordinator(SCENARIOS, chunk_size=len(SCENARIOS))
+
+        def workers():
+            with socket.create_connection(coordinator.address) as rogue:
+                send_message(rogue, ['request'])
+                _, chunk_id, _, _ = recv_message(rogue)
+                send_message(rogue, ['row', chunk_id, {'id': 'forged'}])
+                assert recv_message(rogue) is None
+            run_worker(*coordinator.address)
+
+        thread = threading.Thread(target=workers)
+        thread.start()
+        rows = list(coordinator.results(idle_timeout=30))
+        thread.join()
+
+        assert coordinator.retried == 1
+        assert [row['id'] for row in rows] == [scenario.id for scenario in SCENARIOS]
+
+    def test_chunks_are_read_lazily(self):
+        """
+        Tests that the coordinator only reads scenarios as chunks are handed out
+        """
+        read = []
+
+        def scenarios():
+            for scenario in SCENARIOS:
+                read.append(scenario.id)
+                yield scenario
+
+        coordinator = Coordinator(scenarios(), chunk_size=2)
+        assert read == ['s0', 's1']
+        assert list(coordinator.chunks) == [0]
+
+        rows = list(LocalCluster(workers=1).run(scenarios=(), chunk_size=2))
+        assert rows == []
+        coordinator.server.close()
+
+    def test_failing_scenario(self):
+        """
+        Tests that a scenario raising in the worker is retried MAX_ATTEMPTS times
+        and reported, while the rest of its chunk and the run complete
+        """
+        # from_dict rejects the warm-up on the worker
+        broken = Scenario(id='broken', trucks=2, stations=1, hours=6, warmup_hours=6)
+        coordinator = Coordinator([SCENARIOS[0], broken, *SCENARIOS[1:3]], chunk_size=2)
+
+        thread = threading.Thread(target=run_worker, args=coordinator.address)
+        thread.start()
+        rows = list(coordinator.results(idle_timeout=30))
+        thread.join()
+
+        assert sorted(row['id'] for row in rows) == ['s0', 's1', 's2']
+        assert coordinator.retried == MAX_ATTEMPTS - 1
+        assert [scenario_id for scenario_id, _ in coordinator.failed] == ['broken']
+        assert coordinator.failed[0][1].startswith('ValueError: Scenario broken')
+
+    def test_long_chunk_keeps_its_lease(self):
+        """
+        Tests that heartbeats keep a chunk running longer than its lease from being handed out again
+        """
+        coordinator = Coordinator([LONG_SCENARIO, SCENARIOS[0]], chunk_size=2, lease_s=0.2)
+
+        thread = threading.Thread(target=run_worker, args=coordinator.address)
+        thread.start()
+        rows = list(coordinator.results(idle_timeout=30))
+        thread.join()
+
+        assert coordinator.retried == 0
+        assert [row['id'] for row in rows] == ['long', 's0']
+
+    def test_busy_worker_is_not_idle(self):
+        """
+        Tests that a chunk running longer than the idle timeout does not time the run out
+        """
+        # the default lease sends no heartbeat before the chunk is done
+        coordinator = Coordinator([LONG_SCENARIO])
+
+        thread = threading.Thread(target=run_worker, args=coordinator.address)
+        thread.start()
+        rows = list(coordinator.results(idle_timeout=0.2))
+        thread.join()
+
+        assert [row['id'] for row in rows] == ['long']
@@ -0,0 +1,48 @@
+from statistics import mean, variance
+
+import pytest
+from mining_simulation.estimators import RunningStats, BatchMeans, t_quantile
+
+OBSERVATIONS = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8]
+
+
+class TestEstimators:
+
+    def test_running_stats(self):
+        """
+        Tests that running statistics match the batch formulas
+        """
+        stats = RunningStats()
+        assert stats.half_width() == float('inf')
+
+        for value in OBSERVATIONS:
+            stats.push(value)
+
+        assert stats.count == len(OBSERVATIONS)
+        assert stats.mean == pytest.approx(mean(OBSERVATIONS))
+        assert stats.variance == pytest.approx(variance(OBSERVATIONS))
+        assert stats.half_width(0.95) == pytest.approx(2.200985 * (variance(OBSERVATIONS) / len(OBSERVATIONS)) ** 0.5)
+
+    @pytest.mark.parametrize("confidence, df, expected", [
+        (0.95, 1, 12.7062), (0.95, 2, 4.3027), (0.95, 5, 2.5706), (0.99, 4, 4.6041),
+        (0.90, 7, 1.8946), (0.95, 30, 2.0423), (0.95, 31, 2.0395), (0.95, 100, 1.9840),
+    ])
+    def test_t_quantile(self, confidence, df, expected):
+        """
+        Tests Student's t quantiles against tabulated values on both sides of the series cutoff
+        """
+        assert t_quantile(confidence, df) == pytest.approx(expected, abs=1e-4)
+
+    @pytest.mark.parametrize("batch_size", [1, 3, 4, 5])
+    def test_batch_means(self, batch_size):
+        """
+        Tests that batch means only count full batches
+        """
+        estimator = BatchMeans(batch_size)
+        for value in OBSERVATIONS:
+            estimator.push(value)
+
+        batches = [mean(OBSERVATIONS[i:i + batch_size]) for i in range(0, len(OBSERVATIONS) - batch_size + 1, batch_size)]
+
+        assert estimator.count == len(batches)
+        assert estimator.mean == pytest.approx(mean(batches))
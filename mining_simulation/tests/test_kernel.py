@@ -0,0 +1,88 @@
+import random
+
+import pytest
+from mining_simulation.monitoring import SteadyState
+from mining_simulation.simulator import Simulator
+from mining_simulation.tests.test_simulator import TEST_SCENARIOS
+
+
+def run_simulator(seed, trucks_amt, stations_amt, sim_hours, kernel):
+    """
+    Run a seeded simulation and return its metrics ordered by id.
+    """
+    random.seed(seed)
+    with Simulator(trucks_amt=trucks_amt,
+                   unload_stations_amt=stations_amt,
+                   simulation_hrs=sim_hours) as sim:
+        sim.start(kernel=kernel)
+
+    metrics = sim.performance_data
+    return {kind: sorted(entries, key=lambda entry: entry['id']) for kind, entries in metrics.items()}
+
+
+class TestKernel:
+
+    @pytest.mark.parametrize("scenario", TEST_SCENARIOS, ids=[s["name"] for s in TEST_SCENARIOS])
+    def test_kernel_scenarios(self, scenario, truck_factory):
+        """
+        Test that the kernel reproduces the expected simulator scenarios.
+        """
+        simulator = Simulator(
+            trucks_amt=scenario["trucks_amt"],
+            unload_stations_amt=scenario["stations_amt"],
+            simulation_hrs=scenario["sim_hours"]
+        )
+        simulator.trucks = {truck_factory() for _ in range(scenario["trucks_amt"])}
+
+        with simulator as sim:
+            sim.start(kernel=True)
+
+        metrics = simulator.performance_data
+        trucks = sorted([{key: value for key, value in entry.items() if key != 'id'} for entry in metrics['trucks']], key=lambda truck: truck['waiting'])
+        stations = sorted([{key: value for key, value in entry.items() if key != 'id'} for entry in metrics['stations']], key=lambda station: station['free'])
+
+        assert trucks == scenario["expected_metrics"]['trucks']
+        assert stations == scenario["expected_metrics"]['stations']
+        assert len(simulator.trucks) == scenario["trucks_amt"]
+
+    @pytest.mark.parametrize("seed, trucks_amt, stations_amt", [(1, 7, 3), (2, 25, 2), (3, 40, 6)])
+    def test_kernel_matches_python(self, seed, trucks_amt, stations_amt):
+        """
+        Test that the kernel and the object simulation give identical metrics
+        per truck and per station, including contended stations.
+        """
+        python_metrics = run_simulator(seed, trucks_amt, stations_amt, 24, kernel=False)
+        kernel_metrics = run_simulator(seed, trucks_amt, stations_amt, 24, kernel=True)
+
+        assert kernel_metrics == python_metrics
+
+    @pytest.mark.parametrize("seed, trucks_amt, stations_amt", [(1, 7, 3), (3, 40, 6)])
+    def test_compiled_kernel_matches_python(self, seed, trucks_amt, stations_amt):
+        """
+        Test that the Numba compiled kernel gives the same metrics as the object simulation.
+        """
+        pytest.importorskip('numba')
+        from mining_simulation import kernel
+
+        assert kernel.NUMBA_AVAILABLE
+        # njit dispatchers keep the original function, the fallback is a plain function
+        assert hasattr(kernel._advance, 'py_func')
+
+        python_metrics = run_simulator(seed, trucks_amt, stations_amt, 24, kernel=False)
+        kernel_metrics = run_simulator(seed, trucks_amt, stations_amt, 24, kernel=True)
+
+        assert kernel_metrics == python_metrics
+
+    def test_kernel_unpacks_station_estimates(self):
+        """
+        Test that the kernel leaves the station clocks and expected waits the object simulation would.
+        """
+        def estimates(kernel):
+            random.seed(5)
+            # queues are still long at the end of the run
+            with Simulator(trucks_amt=40, unload_stations_amt=2, simulation_hrs=6, warmup_hrs=2) as sim:
+                sim.start(kernel=kernel, monitors=[SteadyState(check_minutes=37)])
+
+            return [(station.clock, station.busy_until) for station in sim.stations]
+
+        assert estimates(kernel=True) == estimates(kernel=False)
@@ -67,3 +67,28 @@ class TestLocation():
 
 
 
+
+    def test_reserved_arrival(self, truck_factory, basic_unloading_location):
+        """
+        Tests that a reserving truck picks the station with the shortest expected
+        wait and is queued there on arrival
+        """
+        busy = basic_unloading_location.stations[0]
+        blocker = truck_factory()
+        blocker.state = TruckState.UNLOADING
+        busy.add_truck(blocker, blocker.state_time_minutes_map[TruckState.UNLOADING])
+
+        truck = truck_factory()
+        basic_unloading_location.reserve(truck, 1)
+
+        assert truck.reserved_station is not None
+        assert truck.reserved_station is not busy
+        reserved = truck.reserved_station
+
+        truck.state = TruckState.UNLOADING
+        basic_unloading_location.current.add(truck)
+        basic_unloading_location.pass_time()
+
+        assert list(reserved.queue) == [truck]
+        assert truck.reserved_station is None
+        assert reserved.reservations == {}
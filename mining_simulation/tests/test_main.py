@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+from importlib.util import find_spec
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# wall clock budget for the imports of a CLI command, in seconds
+IMPORT_BUDGET_S = 0.1
+
+# wall clock budget for a whole --help or small CLI command after interpreter startup, in seconds
+COMMAND_BUDGET_S = 0.25
+
+HEAVY_MODULES = [
+    'mining_simulation.simulator',
+    'mining_simulation.kernel',
+    'mining_simulation.batch',
+    'mining_simulation.optimize',
+    'mining_simulation.distributed',
+    'mining_simulation.monitoring',
+    'multiprocessing',
+    'numba',
+    'numpy',
+    'pyarrow',
+]
+
+# compiled kernel dependencies, only loaded with --kernel when installed
+KERNEL_MODULES = {'numba', 'numpy'} if find_spec('numba') else set()
+
+PROBE = """
+import json, sys
+from time import perf_counter
+sys.argv = ['mining-simulator'] + json.loads(sys.argv[1])
+start = perf_counter()
+import mining_simulation.main as main
+try:
+    main.main()
+except SystemExit:
+    pass
+command_s = perf_counter() - start
+print(json.dumps({'command_s': command_s, 'modules': sorted(sys.modules)}))
+"""
+
+
+def import_seconds(importtime):
+    """
+    Cumulative import time of the package modules imported by a command, from -X importtime output.
+
+    Lines are 'import time: self | cumulative | name' with nested imports
+    indented under the name, only top level imports are summed so a module
+    and everything it pulls in are counted once.
+    """
+    total_us = 0
+    for line in importtime.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        _, cumulative, name = line.split('|')
+        if not name.startswith(' ' * 2) and name.strip().startswith('mining_simulation'):
+            total_us += int(cumulative)
+
+    return total_us / 1e6
+
+
+def run_cli(args):
+    """
+    Run the CLI in a fresh interpreter and report its timings and loaded modules.
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE, json.dumps(args)],
+                               capture_output=True, text=True, check=True)
+
+    probe = json.loads(completed.stdout.splitlines()[-1])
+    probe['import_s'] = import_seconds(completed.stderr)
+
+    return probe
+
+
+class TestMain:
+
+    def test_import_budget(self):
+        """
+        Tests that --help stays within budget and loads none of the simulation modules
+        """
+        probe = run_cli(['--help'])
+
+        assert 0 < probe['import_s'] < IMPORT_BUDGET_S
+        assert probe['command_s'] < COMMAND_BUDGET_S
+        assert not set(HEAVY_MODULES) & set(probe['modules'])
+
+    def test_small_run_budget(self):
+        """
+        Tests that a small run, simulator and models imports included, stays within budget
+        """
+        probe = run_cli(['--trucks', '2', '--stations', '1', '--hours', '1'])
+
+        assert 'mining_simulation.simulator' in probe['modules']
+        assert probe['import_s'] < IMPORT_BUDGET_S
+        assert probe['command_s'] < COMMAND_BUDGET_S
+
+    @pytest.mark.parametrize("args, loaded", [
+        (['--trucks', '2', '--hours', '1'], {'mining_simulation.simulator'}),
+        (['--trucks', '2', '--hours', '1', '--kernel'], {'mining_simulation.simulator', 'mining_simulation.kernel'} | KERNEL_MODULES),
+        (['--trucks', '2', '--hours', '1', '--progress'], {'mining_simulation.simulator', 'mining_simulation.monitoring'}),
+    ])
+    def test_lazy_features(self, args, loaded):
+        """
+        Tests that small runs only load the modules of the features they use
+        """
+        probe = run_cli(args)
+
+        assert set(HEAVY_MODULES) & set(probe['modules']) == loaded
+
+    @pytest.mark.parametrize("args", [
+        ['--warmup-hours', '3', '--hours', '2'],
+        ['--kernel', '--reservations'],
+        ['--kernel', '--priority-trucks', '1'],
+        ['--kernel', '--trajectory', 'trajectory.bin'],
+    ])
+    def test_invalid_flags(self, args, tmp_path):
+        """
+        Tests that incompatible flags are reported as usage errors instead of tracebacks
+        """
+        completed = subprocess.run([sys.executable, '-m', 'mining_simulation.main', *args],
+                                   capture_output=True, text=True, cwd=tmp_path,
+                                   env={**os.environ, 'PYTHONPATH': ROOT})
+
+        assert completed.returncode == 2
+        assert 'Traceback' not in completed.stderr
+        assert 'error:' in completed.stderr
@@ -0,0 +1,164 @@
+import random
+
+import pytest
+from mining_simulation.simulator import Simulator
+from mining_simulation.monitoring import DeliveryRateWindow, ProgressReporter, WallClockBudget, ConfidenceInterval, SteadyState, SteadyStateStatistics
+
+
+class StopAt:
+    """
+    Monitor stopping the run once a simulated minute is reached.
+    """
+
+    def __init__(self, minute, check_minutes=30):
+        self.minute = minute
+        self.check_minutes = check_minutes
+
+    def update(self, simulator):
+        return simulator.minute >= self.minute
+
+
+class TestMonitoring:
+
+    @pytest.mark.parametrize("kernel", [False, True])
+    def test_progress_reporter(self, kernel):
+        """
+        Tests that progress is reported at every check when not rate limited
+        and that monitors do not change the results
+        """
+        reports = []
+        random.seed(4)
+        with Simulator(trucks_amt=5, unload_stations_amt=2, simulation_hrs=10) as sim:
+            sim.start(kernel=kernel, monitors=[ProgressReporter(reports.append, min_seconds=0)])
+
+        random.seed(4)
+        with Simulator(trucks_amt=5, unload_stations_amt=2, simulation_hrs=10) as plain:
+            plain.start()
+
+        assert [report.minute for report in reports] == [hour * 60 for hour in range(1, 11)]
+        assert reports[-1].delivered == sim.fleet_totals()['delivered']
+        assert reports[-1].deliveries_per_hour == reports[-1].delivered / 10
+        assert reports[-1].events == 600 * 7
+        assert sim.stopped_by is None
+        for kind in ('trucks', 'stations'):
+            ordered = [row.to_dict() for row in getattr(sim.results, kind).sorted('id')]
+            assert ordered == [row.to_dict() for row in getattr(plain.results, kind).sorted('id')]
+
+    def test_rate_limited_progress(self):
+        """
+        Tests that progress reports are bounded by wall clock time
+        """
+        reports = []
+        with Simulator(trucks_amt=2, unload_stations_amt=1, simulation_hrs=10) as sim:
+            sim.start(monitors=[ProgressReporter(reports.append, min_seconds=3600)])
+
+        assert len(reports) == 1
+
+    @pytest.mark.parametrize("kernel", [False, True])
+    def test_stopping_rules(self, kernel):
+        """
+        Tests that a run stops at the first monitor asking for it
+        """
+        rule = StopAt(90)
+        with Simulator(trucks_amt=3, unload_stations_amt=1, simulation_hrs=10) as sim:
+            sim.start(kernel=kernel, monitors=[rule])
+
+        assert sim.stopped_by is rule
+        assert sim.minute == 90
+        assert sim.results.totals()['free'] + sim.results.totals()['occupied'] == 90
+
+        budget = WallClockBudget(0)
+        with Simulator(trucks_amt=3, unload_stations_amt=1, simulation_hrs=10) as sim:
+            sim.start(kernel=kernel, monitors=[budget])
+
+        assert sim.stopped_by is budget
+        assert sim.minute == 60
+
+    def test_invalid_monitors(self):
+        """
+        Tests that monitors that would never advance the run are refused
+        """
+        sim = Simulator(trucks_amt=3, unload_stations_amt=1, simulation_hrs=10)
+
+        assert sim.stopped_by is None and sim.minute == 0
+        with pytest.raises(ValueError):
+            sim.start(monitors=[StopAt(90, check_minutes=0)])
+        with pytest.raises(TypeError):
+            DeliveryRateWindow()
+
+    def test_convergence_rules(self):
+        """
+        Tests that delivery rate rules stop long runs once the rate has converged
+        """
+        random.seed(2)
+        steady = SteadyState(tolerance=0.1)
+        with Simulator(trucks_amt=20, unload_stations_amt=3, simulation_hrs=1000) as sim:
+            sim.start(monitors=[steady])
+
+        assert sim.stopped_by is steady
+        assert sim.minute < 1000 * 60
+
+        random.seed(2)
+        interval = ConfidenceInterval(half_width=1.0)
+        with Simulator(trucks_amt=20, unload_stations_amt=3, simulation_hrs=1000) as sim:
+            sim.start(monitors=[interval])
+
+        assert sim.stopped_by is interval
+        assert interval.stats.half_width() <= 1.0
+        assert interval.stats.count >= interval.min_batches
+
+    @pytest.mark.parametrize("kernel", [False, True])
+    def test_steady_state_statistics(self, kernel):
+        """
+        Tests that steady-state estimates skip the warm-up and cover the rest of the run
+        """
+        statistics = SteadyStateStatistics(batch_size=2, check_minutes=60)
+        with Simulator(trucks_amt=6, unload_stations_amt=2, simulation_hrs=30, warmup_hrs=10) as sim:
+            sim.start(kernel=kernel, monitors=[statistics])
+
+        summary = statistics.summary()
+        totals = sim.results.totals()
+
+        assert statistics.estimators['delivered'].count == 10
+        assert summary['delivered'][0] == pytest.approx(totals['delivered'] / 20)
+        assert summary['free'][0] + summary['occupied'][0] == pytest.approx(2 * 60)
+
+        # without warm-up the first hour is measured from the start of the run
+        statistics = SteadyStateStatistics(batch_size=2, check_minutes=60)
+        with Simulator(trucks_amt=6, unload_stations_amt=2, simulation_hrs=20) as sim:
+            sim.start(kernel=kernel, monitors=[statistics])
+
+        assert statistics.estimators['delivered'].count == 10
+        assert statistics.summary()['delivered'][0] == pytest.approx(sim.results.totals()['delivered'] / 20)
+
+    def test_reused_monitors(self):
+        """
+        Tests that a monitor watching a second run starts over instead of carrying the first run's state
+        """
+        statistics = SteadyStateStatistics(batch_size=2)
+        steady = SteadyState(tolerance=0.1)
+        summaries = []
+        for _ in range(2):
+            random.seed(5)
+            with Simulator(trucks_amt=20, unload_stations_amt=3, simulation_hrs=100) as sim:
+                sim.start(monitors=[statistics, steady])
+            summaries.append((statistics.summary(), sim.minute))
+
+        assert summaries[0] == summaries[1]
+        assert statistics.estimators['delivered'].mean >= 0
+
+    def test_confidence_interval_batches(self):
+        """
+        Tests that confidence interval batches span the longest truck cycle by default
+        """
+        assert ConfidenceInterval(1.0).stats.batch_size == 7
+        assert ConfidenceInterval(1.0, check_minutes=30).stats.batch_size == 13
+        assert ConfidenceInterval(1.0, batch_size=3).stats.batch_size == 3
+
+    def test_stopped_in_warmup(self):
+        """
+        Tests that a run stopped inside its warm-up does not report results
+        """
+        with pytest.raises(RuntimeError):
+            with Simulator(trucks_amt=3, unload_stations_amt=1, simulation_hrs=10, warmup_hrs=5) as sim:
+                sim.start(monitors=[StopAt(90)])
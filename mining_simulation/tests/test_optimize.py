@@ -0,0 +1,69 @@
+import pytest
+from mining_simulation.optimize import Candidate, FleetOptimizer
+
+
+class TestOptimize:
+
+    def test_candidate_shortfall(self):
+        """
+        Tests candidate evaluation and the distance to the target
+        """
+        candidate = Candidate(trucks=4, stations=1, cost=5)
+        candidate.evaluate(24, [{'minutes': 1440, 'delivered': 30, 'waiting': 60},
+                                {'minutes': 1440, 'delivered': 10, 'waiting': 0}])
+
+        assert candidate.loads_per_day == 20
+        assert candidate.avg_wait == 1.5
+        assert candidate.shortfall(20, 2) == 0
+        assert candidate.shortfall(40, 2) == pytest.approx(0.5)
+        assert candidate.shortfall(20, 1) == pytest.approx(0.5)
+
+    def test_successive_halving(self):
+        """
+        Tests that the search returns the cheapest feasible fleet while promoting
+        only a fraction of the candidates to the long horizon
+        """
+        optimizer = FleetOptimizer(target_loads=20, max_wait=1, max_trucks=8, max_stations=2,
+                                   station_cost=3, min_hours=12, max_hours=108, replications=1)
+        best = optimizer.run(workers=2)
+
+        assert best is not None
+        assert best.hours == 108
+        assert best.shortfall(20, 1) == 0
+        assert best.stations == 1
+
+        # a cheaper fleet misses the target on the long horizon
+        cheaper = FleetOptimizer(target_loads=20, max_wait=1, max_trucks=best.trucks - 1, max_stations=1,
+                                 min_hours=108, max_hours=108, replications=1)
+        assert cheaper.run(workers=2) is None
+
+        # 16 candidates at 12h and 6 more replications around the cut at 6,
+        # 6 candidates at 36h and 2 more around the cut at 2, 2 at 108h
+        assert optimizer.simulations == 16 + 6 + 6 + 2 + 2
+
+    def test_rung_warmup(self):
+        """
+        Tests that short rungs leave out their start-up transient unless a warm-up is given
+        """
+        optimizer = FleetOptimizer(target_loads=20, max_wait=1, max_trucks=2, max_stations=1)
+        assert optimizer.rung_warmup(12) == 6
+        assert optimizer.rung_warmup(648) == 7
+
+        fixed = FleetOptimizer(target_loads=20, max_wait=1, max_trucks=2, max_stations=1, warmup_hours=2)
+        assert fixed.rung_warmup(648) == 2
+
+        with pytest.raises(ValueError):
+            FleetOptimizer(target_loads=20, max_wait=1, max_trucks=2, max_stations=1, min_hours=12, warmup_hours=12)
+
+    def test_extra_replications_at_the_cut(self):
+        """
+        Tests that candidates close to a cut are judged on more replications than the others
+        """
+        optimizer = FleetOptimizer(target_loads=20, max_wait=1, max_trucks=6, max_stations=1,
+                                   min_hours=12, max_hours=36, replications=1)
+        optimizer.run(workers=2)
+
+        # 6 candidates at 12h and the ranks 2 and 3 either side of the cut again, 2 at 36h
+        assert optimizer.simulations == 6 + 2 + 2
+        assert sorted(len(candidate.rows) for candidate in optimizer.candidates if candidate.hours == 12) in (
+            [1, 1, 1, 1], [1, 1, 1, 2])
@@ -0,0 +1,31 @@
+from mining_simulation.results import SimulationResults
+
+
+class TestResults:
+
+    def test_results_views(self, truck_factory, basic_station):
+        """
+        Tests that result views read the live counters, filter, select top-k
+        and only build dictionaries on request
+        """
+        trucks = [truck_factory() for _ in range(4)]
+        for delivered, truck in enumerate(trucks):
+            truck.performance['delivered'] = delivered
+        basic_station.performance['unloaded'] = 6
+
+        results = SimulationResults(trucks, [basic_station])
+
+        assert results.trucks.columns == ['id', 'mining', 'traveling', 'unloading', 'waiting', 'delivered']
+        assert results.trucks['delivered'] == [0, 1, 2, 3]
+        assert results.stations['unloaded'] == [6]
+
+        # views are lazy, later counter changes are visible
+        trucks[0].performance['delivered'] = 10
+        assert [row['id'] for row in results.trucks.top(2, 'delivered')] == [trucks[0].id, trucks[3].id]
+        assert [row['id'] for row in results.trucks.top(1, 'delivered', largest=False)] == [trucks[1].id]
+
+        busy = results.trucks.filter(lambda row: row['delivered'] >= 2)
+        assert len(busy) == 3
+        assert busy.filter(lambda row: row['id'] != trucks[0].id)['delivered'] == [2, 3]
+
+        assert results.to_dict()['stations'] == [{'id': basic_station.id, 'free': 0, 'occupied': 0, 'unloaded': 6}]
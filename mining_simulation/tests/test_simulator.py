@@ -89,4 +89,72 @@ class TestSimulator:
         assert metrics['stations'] == expected_metrics['stations']
 
         assert len(simulator.trucks) == trucks_amt
-        assert len(simulator.stations) == stations_amt
\ No newline at end of file
+        assert len(simulator.stations) == stations_amt
+
+    def test_performance_data_before_end(self):
+        """
+        Test that metrics are empty until the simulation has ended.
+        """
+        simulator = Simulator(trucks_amt=2, unload_stations_amt=1, simulation_hrs=1)
+
+        assert simulator.performance_data == {'trucks': [], 'stations': []}
+
+        with simulator as sim:
+            sim.start()
+
+        assert len(simulator.performance_data['trucks']) == 2
+
+    def test_warmup_truncation(self, truck_factory):
+        """
+        Test that metrics gathered during warm-up are left out of the results.
+        """
+        simulator = Simulator(trucks_amt=1, unload_stations_amt=1, simulation_hrs=12, warmup_hrs=2)
+        simulator.trucks = {truck_factory()}
+
+        with simulator as sim:
+            sim.start()
+
+        # the truck mines for the whole warm-up, then the balanced cycle repeats
+        truck = simulator.performance_data['trucks'][0]
+        station = simulator.performance_data['stations'][0]
+
+        assert truck['mining'] == 480 - 120
+        assert truck['delivered'] == 4
+        assert station['free'] + station['occupied'] == 600
+
+    def test_reservations(self):
+        """
+        Test that reservations and priority classes run and keep deliveries consistent,
+        and that the kernel refuses them.
+        """
+        with Simulator(trucks_amt=12, unload_stations_amt=2, simulation_hrs=24, seed=1,
+                       priority_trucks=4, reservations=True) as sim:
+            sim.start()
+
+        totals = sim.results.totals()
+        assert totals['delivered'] == totals['unloaded'] > 0
+        # pending reservations belong to trucks still on their way
+        for station in sim.stations:
+            for truck in station.reservations:
+                assert truck.state == TruckState.TRAVELING
+                assert truck.reserved_station is station
+
+        with pytest.raises(ValueError):
+            with Simulator(trucks_amt=2, unload_stations_amt=1, simulation_hrs=1, reservations=True) as sim:
+                sim.start(kernel=True)
+
+    @pytest.mark.parametrize("reservations", [False, True])
+    def test_priority_trucks_wait_less(self, reservations):
+        """
+        Test that high priority trucks wait less per delivery than the rest of a contended fleet.
+        """
+        with Simulator(trucks_amt=30, unload_stations_amt=2, simulation_hrs=72, seed=1,
+                       priority_trucks=10, reservations=reservations) as sim:
+            sim.start()
+
+        def wait_per_delivery(priority):
+            trucks = [truck for truck in sim.fleet if truck.priority == priority]
+            return (sum(truck.performance[TruckState.WAITING] for truck in trucks)
+                    / sum(truck.performance['delivered'] for truck in trucks))
+
+        assert wait_per_delivery(1) < wait_per_delivery(0) / 2
@@ -22,7 +22,7 @@ class TestStation():
         # check that station initializes correctly
         assert basic_station.state == UnloadStationState.FREE
         assert len(basic_station.queue) == 0
-        assert basic_station.queue_time == 0
+        assert basic_station.expected_wait(basic_station.clock) == 0
         assert basic_station.performance["unloaded"] == 0
         
         basic_station.pass_time(DEFAULT_WAIT_TIME)
@@ -33,7 +33,7 @@ class TestStation():
         basic_station.add_truck(truck_1, DEFAULT_WAIT_TIME)
 
         assert truck_1.state == TruckState.UNLOADING
-        assert basic_station.queue_time == wait_time
+        assert basic_station.expected_wait(basic_station.clock) == DEFAULT_WAIT_TIME
 
         # check that adding a second truck puts it into waiting
         # and values get updated 
@@ -43,7 +43,7 @@ class TestStation():
         
         assert basic_station.state == UnloadStationState.OCCUPIED
         assert len(basic_station.queue) == 2
-        assert basic_station.queue_time == wait_time * 2
+        assert basic_station.expected_wait(basic_station.clock) == DEFAULT_WAIT_TIME * 2
 
         # check that after passing time, we get our first truck back
         # and performance metrics reflect that
@@ -56,3 +56,50 @@ class TestStation():
         assert basic_station.queue[0] == truck_2
 
         assert basic_station.queue[0].state == TruckState.UNLOADING
+
+    def test_priority_queue(self, basic_station, truck_factory):
+        """
+        Tests that higher priority trucks overtake waiting trucks but never the unloading one
+        """
+        front, first, second = truck_factory(), truck_factory(), truck_factory()
+        urgent = truck_factory()
+        urgent.priority = 1
+        for truck in (front, first, second, urgent):
+            truck.state = TruckState.UNLOADING
+            truck.time_left = DEFAULT_WAIT_TIME
+            basic_station.add_truck(truck, DEFAULT_WAIT_TIME)
+
+        assert list(basic_station.queue) == [front, urgent, first, second]
+        assert urgent.state == TruckState.WAITING
+
+        # low priority trucks wait for everyone, the urgent one only for the front truck
+        assert basic_station.expected_wait(0) == DEFAULT_WAIT_TIME * 4
+        assert basic_station.expected_wait(0, priority=1) == DEFAULT_WAIT_TIME * 2
+
+        # estimates move with the clock without being decremented
+        basic_station.pass_time(DEFAULT_WAIT_TIME)
+        assert basic_station.queue[0] == urgent
+        assert basic_station.expected_wait(DEFAULT_WAIT_TIME) == DEFAULT_WAIT_TIME * 3
+        assert basic_station.expected_wait(DEFAULT_WAIT_TIME, priority=1) == DEFAULT_WAIT_TIME
+
+    def test_reservation(self, basic_station, truck_factory):
+        """
+        Tests that reservations count towards the expected wait and are fulfilled on arrival
+        """
+        truck = truck_factory()
+        basic_station.reserve(truck, 10)
+
+        assert basic_station.expected_wait(0) == 10 + DEFAULT_WAIT_TIME
+        assert basic_station.expected_wait(12) == DEFAULT_WAIT_TIME - 2
+
+        for _ in range(10):
+            basic_station.pass_time()
+
+        # the reservation survives the station being empty until the truck arrives
+        assert basic_station.expected_wait(10) == DEFAULT_WAIT_TIME
+
+        truck.state = TruckState.UNLOADING
+        basic_station.add_truck(truck, DEFAULT_WAIT_TIME)
+
+        assert basic_station.reservations == {}
+        assert basic_station.expected_wait(10) == DEFAULT_WAIT_TIME
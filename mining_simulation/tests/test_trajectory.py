@@ -0,0 +1,99 @@
+import random
+
+import pytest
+from mining_simulation.simulator import Simulator
+from mining_simulation.models.truck import TruckState
+from mining_simulation.trajectory import TrajectoryRecorder, TrajectoryReader, TrajectoryWriter, NO_STATION
+
+SNAPSHOT_MINUTE = 400
+
+
+class QueueSnapshot:
+    """
+    Monitor keeping the station queues at a single minute.
+    """
+
+    def __init__(self, minute):
+        self.check_minutes = minute
+        self.queues = None
+
+    def update(self, simulator):
+        if self.queues is None:
+            self.queues = {station.id: {truck.id for truck in station.queue} for station in simulator.stations}
+
+        return False
+
+
+class TestTrajectory:
+
+    def test_writer_reader(self, tmp_path):
+        """
+        Tests the binary layout round trip, window queries and the per truck index
+        """
+        path = str(tmp_path / "trajectory.bin")
+        writer = TrajectoryWriter(path)
+        writer.append(1, TruckState.MINING, 0, 60)
+        writer.append(0, TruckState.MINING, 0, 120)
+        writer.append(1, TruckState.TRAVELING, 60, 30)
+        writer.append(1, TruckState.UNLOADING, 90, 5, station=2)
+        writer.close()
+
+        with TrajectoryReader(path) as reader:
+            assert len(reader) == 4
+            assert reader.trucks == 2
+            assert [segment.state for segment in reader.segments(1)] == [TruckState.MINING, TruckState.TRAVELING, TruckState.UNLOADING]
+            assert [segment.start for segment in reader.segments(1, 59, 91)] == [0, 60, 90]
+            assert reader.state_at(1, 92).station == 2
+            assert reader.state_at(0, 119).state == TruckState.MINING
+            assert reader.state_at(0, 120) is None
+            assert reader.station_queue(2, 94) == [1]
+            assert len(list(reader.window(100, 200))) == 1
+
+    def test_recorded_run(self, tmp_path):
+        """
+        Tests that a recorded run matches the performance counters and station queues
+        """
+        path = str(tmp_path / "trajectory.bin")
+        recorder = TrajectoryRecorder(path)
+        snapshot = QueueSnapshot(SNAPSHOT_MINUTE)
+
+        random.seed(3)
+        with Simulator(trucks_amt=12, unload_stations_amt=2, simulation_hrs=24) as sim:
+            sim.start(monitors=[recorder, snapshot])
+
+        with TrajectoryReader(path) as reader:
+            for truck in sim.trucks:
+                segments = list(reader.segments(truck.id))
+
+                # segments are contiguous over the whole run
+                assert segments[0].start == 0
+                assert sum(segment.duration for segment in segments) == sim.minute
+                for before, after in zip(segments, segments[1:]):
+                    assert before.start + before.duration == after.start
+                    assert before.state != after.state
+
+                for state in TruckState:
+                    assert sum(segment.duration for segment in segments if segment.state == state) == truck.performance[state]
+
+                for segment in segments:
+                    assert (segment.station != NO_STATION) == (segment.state in (TruckState.WAITING, TruckState.UNLOADING))
+
+            for station_id, queue in snapshot.queues.items():
+                assert queue <= set(reader.station_queue(station_id, SNAPSHOT_MINUTE))
+
+    def test_kernel_not_supported(self, tmp_path):
+        """
+        Tests that recording refuses the kernel backend before the first tick
+        and leaves a closed, readable empty trajectory
+        """
+        path = str(tmp_path / "trajectory.bin")
+        recorder = TrajectoryRecorder(path)
+        with pytest.raises(ValueError):
+            with Simulator(trucks_amt=2, unload_stations_amt=1, simulation_hrs=1) as sim:
+                sim.start(kernel=True, monitors=[recorder])
+
+        assert sim.ticks == 0
+        assert recorder.writer.file.closed
+        with TrajectoryReader(path) as reader:
+            assert len(reader) == 0
+            assert list(reader.window()) == []
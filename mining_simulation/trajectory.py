@@ -0,0 +1,298 @@
+"""
+Trajectory store for the mining simulation.
+
+This module records the state trajectory of every truck as run-length encoded
+segments in an append-only binary file, and reads it back through memory maps
+without loading the file, so any window of a long run can be replayed or
+queried after the fact.
+
+The data file is a 16 byte header followed by fixed 16 byte records:
+
+    truck_id u32 | start u32 | duration u32 | station i16 | state u8 | pad
+
+Segments cover the minutes [start, start + duration) and agree with the
+truck's performance counters. The station is the one the truck is queued at
+for WAITING and UNLOADING segments and NO_STATION otherwise. An index file
+next to it (path + '.idx') holds, per truck, the record numbers of its
+segments in time order.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from mining_simulation.constants import PASS_TIME_MIN
+from mining_simulation.models.truck import TruckState
+
+DATA_MAGIC = b'MTRJ'
+INDEX_MAGIC = b'MTRI'
+VERSION = 1
+HEADER = struct.Struct('<4sIII')
+RECORD = struct.Struct('<IIIhBx')
+INDEX_HEADER = struct.Struct('<4sIIc3x')
+NO_STATION = -1
+
+QUEUED_STATES = (TruckState.WAITING, TruckState.UNLOADING)
+
+Segment = namedtuple('Segment', ['truck_id', 'state', 'start', 'duration', 'station'])
+
+
+class TrajectoryWriter:
+    """
+    Appends segments to a trajectory file and writes its index when closed.
+    """
+
+    def __init__(self, path):
+        """
+        Create the trajectory file.
+        """
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(DATA_MAGIC, VERSION, RECORD.size, 0))
+        self.records = 0
+        # segments per truck id, the counting pass of the index sort
+        self.counts = array('Q')
+
+    def append(self, truck_id, state, start, duration, station=NO_STATION):
+        """
+        Append a segment.
+        """
+        self.file.write(RECORD.pack(truck_id, start, duration, station, state.value))
+        self.records += 1
+        if truck_id >= len(self.counts):
+            self.counts.extend([0] * (truck_id + 1 - len(self.counts)))
+        self.counts[truck_id] += 1
+
+    def close(self):
+        """
+        Close the file and build the per truck index with a counting sort.
+
+        The counts are kept while appending, the placement pass streams over
+        the mapped records and writes record numbers straight into the mapped
+        index file, so memory stays proportional to the number of trucks.
+        """
+        self.file.close()
+
+        trucks = len(self.counts)
+        offsets = array('Q', [0] * (trucks + 1))
+        for truck_id in range(trucks):
+            offsets[truck_id + 1] = offsets[truck_id] + self.counts[truck_id]
+
+        offsets_end = INDEX_HEADER.size + offsets.itemsize * (trucks + 1)
+        with open(self.path + '.idx', 'wb+') as index:
+            index.write(INDEX_HEADER.pack(INDEX_MAGIC, VERSION, trucks, sys.byteorder[0].encode()))
+            index.write(offsets.tobytes())
+            if not self.records:
+                return
+
+            index.truncate(offsets_end + self.records * array('I').itemsize)
+            with open(self.path, 'rb') as data, \
+                    mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as data_view, \
+                    mmap.mmap(index.fileno(), 0) as index_view:
+                segments = memoryview(data_view)[HEADER.size:]
+                records = memoryview(index_view)[offsets_end:].cast('I')
+                # segments of a truck are appended in time order, the sort is stable
+                fill = offsets[:-1]
+                for record, (truck_id, *_) in enumerate(RECORD.iter_unpack(segments)):
+                    records[fill[truck_id]] = record
+                    fill[truck_id] += 1
+                records.release()
+                segments.release()
+
+
+class TrajectoryRecorder:
+    """
+    Monitor recording every truck's trajectory while a simulation runs.
+
+    It checks the trucks after every tick and detects state changes from the
+    performance counters, so segments match the counters exactly. Recording
+    starts with the run and requires the object backend, which is checked
+    before the first tick.
+    """
+
+    def __init__(self, path, interval=PASS_TIME_MIN):
+        """
+        Initialize the recorder, interval has to match the simulation interval.
+        """
+        self.writer = TrajectoryWriter(path)
+        self.check_minutes = interval
+        self.open = None
+
+    def start(self, simulator):
+        """
+        Refuse the kernel backend, leaving an empty but valid trajectory behind.
+        """
+        if simulator.uses_kernel:
+            self.writer.close()
+            raise ValueError("Trajectory recording requires the object backend, run without kernel")
+
+    def update(self, simulator):
+        """
+        Close the segments of trucks that changed state during the last tick.
+        """
+        previous = simulator.minute - self.check_minutes
+        if self.open is None:
+            # every counter is zero at the start of the run
+            self.open = {truck: [None, 0, {state: 0 for state in TruckState}, NO_STATION]
+                         for truck in simulator.fleet}
+
+        stations = None
+        for truck, segment in self.open.items():
+            state, start, counters, station = segment
+            performance = truck.performance
+            if state is not None and performance[state] - counters[state] == simulator.minute - start:
+                continue
+
+            if state is not None:
+                self.writer.append(truck.id, state, start, previous - start, station)
+
+            # the counter that moved during the last tick is the new state,
+            # the others have not moved since the previous segment started
+            new_state = next(key for key in TruckState if key is not state and performance[key] != counters[key])
+            counters = {key: performance[key] for key in TruckState}
+            counters[new_state] -= self.check_minutes
+
+            station = NO_STATION
+            if new_state in QUEUED_STATES:
+                if stations is None:
+                    stations = {queued: unload_station.id for unload_station in simulator.stations
+                                for queued in unload_station.queue}
+                station = stations.get(truck, NO_STATION)
+
+            self.open[truck] = [new_state, previous, counters, station]
+
+        return False
+
+    def finish(self, simulator):
+        """
+        Write the segments still open at the end of the run and build the index.
+        """
+        for truck, (state, start, _, station) in (self.open or {}).items():
+            self.writer.append(truck.id, state, start, simulator.minute - start, station)
+
+        self.writer.close()
+
+
+class TrajectoryReader:
+    """
+    Zero-copy reader of a trajectory file and its index through memory maps.
+    """
+
+    def __init__(self, path):
+        """
+        Map the trajectory and index files.
+        """
+        self._data_file = open(path, 'rb')
+        self._index_file = open(path + '.idx', 'rb')
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, _ = HEADER.unpack_from(self._data)
+        if magic != DATA_MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a version {VERSION} trajectory file")
+
+        magic, version, self.trucks, byteorder = INDEX_HEADER.unpack_from(self._index)
+        if magic != INDEX_MAGIC or version != VERSION or byteorder != sys.byteorder[0].encode():
+            raise ValueError(f"{path}.idx is not a version {VERSION} index for this platform")
+
+        offsets_end = INDEX_HEADER.size + (self.trucks + 1) * 8
+        self._index_view = memoryview(self._index)
+        self._offsets = self._index_view[INDEX_HEADER.size:offsets_end].cast('Q')
+        self._records = self._index_view[offsets_end:].cast('I')
+
+    def __len__(self):
+        """
+        Number of segments in the file.
+        """
+        return len(self._records)
+
+    def _segment(self, record):
+        """
+        Decode a single record.
+        """
+        truck_id, start, duration, station, state = RECORD.unpack_from(self._data, HEADER.size + record * RECORD.size)
+
+        return Segment(truck_id, TruckState(state), start, duration, station)
+
+    def _start(self, record):
+        """
+        Start minute of a record.
+        """
+        return RECORD.unpack_from(self._data, HEADER.size + record * RECORD.size)[1]
+
+    def _first_overlapping(self, truck_id, minute):
+        """
+        Position in the index of the first segment of a truck ending after minute.
+        """
+        low, high = self._offsets[truck_id], self._offsets[truck_id + 1]
+        first = low
+        # last segment starting at or before minute
+        while low < high:
+            middle = (low + high) // 2
+            if self._start(self._records[middle]) <= minute:
+                first = middle
+                low = middle + 1
+            else:
+                high = middle
+
+        return first
+
+    def segments(self, truck_id, start=0, end=None):
+        """
+        Iterate over the segments of a truck overlapping the window [start, end).
+        """
+        if truck_id >= self.trucks:
+            return
+
+        for position in range(self._first_overlapping(truck_id, start), self._offsets[truck_id + 1]):
+            segment = self._segment(self._records[position])
+            if end is not None and segment.start >= end:
+                break
+            if segment.start + segment.duration > start:
+                yield segment
+
+    def window(self, start=0, end=None):
+        """
+        Iterate over the segments of every truck overlapping the window [start, end).
+        """
+        for truck_id in range(self.trucks):
+            yield from self.segments(truck_id, start, end)
+
+    def state_at(self, truck_id, minute):
+        """
+        Segment a truck was in at a minute, None outside the recording.
+        """
+        return next(self.segments(truck_id, minute, minute + 1), None)
+
+    def station_queue(self, station_id, minute):
+        """
+        Ids of the trucks waiting or unloading at a station at a minute.
+        """
+        queue = []
+        for truck_id in range(self.trucks):
+            segment = self.state_at(truck_id, minute)
+            if segment is not None and segment.station == station_id and segment.state in QUEUED_STATES:
+                queue.append(truck_id)
+
+        return queue
+
+    def close(self):
+        """
+        Release the memory maps and files.
+        """
+        self._offsets.release()
+        self._records.release()
+        self._index_view.release()
+        self._data.close()
+        self._index.close()
+        self._data_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+        return False
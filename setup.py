@@ -9,6 +9,10 @@ setup(
     install_requires=[
         "pytest>=8.0.0", 
     ],
+    extras_require={
+        "fast": ["numba", "numpy"],
+        "parquet": ["pyarrow"],
+    },
     entry_points={
         "console_scripts": [
            "mining-simulator=mining_simulation.main:main", 